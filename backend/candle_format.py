@@ -0,0 +1,145 @@
+"""
+Candle Wire Formats
+Content negotiation for endpoints that ship candle series.
+
+- application/json (default): the original array of candle objects
+- application/vnd.tradelingo.columnar+json: {"t": [...], "o": [...], ...}
+  with epoch-second timestamps instead of repeated keys and ISO strings;
+  a single candle ("new_candle") becomes one-row columns
+- application/msgpack: the columnar shape as MessagePack, with numeric
+  columns packed as little-endian Float64 typed arrays
+"""
+import sys
+import json
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import msgpack
+    USE_MSGPACK = True
+except ImportError:
+    USE_MSGPACK = False
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_MSGPACK = "msgpack"
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.tradelingo.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+MEDIA_TYPES = {
+    "application/json": FORMAT_JSON,
+    COLUMNAR_MEDIA_TYPE: FORMAT_COLUMNAR,
+    MSGPACK_MEDIA_TYPE: FORMAT_MSGPACK,
+    "application/x-msgpack": FORMAT_MSGPACK,
+    "application/vnd.msgpack": FORMAT_MSGPACK,
+}
+
+# Short column names for the standard candle fields
+COLUMN_NAMES = {
+    "timestamp": "t",
+    "time": "t",
+    "open": "o",
+    "high": "h",
+    "low": "l",
+    "close": "c",
+    "volume": "v",
+}
+
+
+def negotiate_candle_format(accept: Optional[str]) -> str:
+    """Pick the best candle format from an Accept header, defaulting to plain JSON"""
+    if not accept:
+        return FORMAT_JSON
+
+    best_format, best_q = FORMAT_JSON, 0.0
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        fmt = MEDIA_TYPES.get(media_type.lower())
+        if fmt is None or (fmt == FORMAT_MSGPACK and not USE_MSGPACK):
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        # Ties keep the earlier (more preferred) entry
+        if q > best_q:
+            best_format, best_q = fmt, q
+    return best_format
+
+
+def to_epoch(value) -> int:
+    """Convert an ISO timestamp or YYYY-MM-DD date to epoch seconds (UTC)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _float64_bytes(values: List[float]) -> bytes:
+    packed = array("d", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def candles_to_columns(candles: List[Dict], typed: bool = False) -> Dict:
+    """Turn a list of candle dicts into one list (or typed array) per field"""
+    columns: Dict[str, list] = {}
+    for i, candle in enumerate(candles):
+        for key, value in candle.items():
+            name = COLUMN_NAMES.get(key, key)
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * i
+            column.append(to_epoch(value) if name == "t" else value)
+        for column in columns.values():
+            if len(column) < i + 1:
+                column.append(None)
+
+    if typed:
+        for name, column in columns.items():
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in column):
+                columns[name] = _float64_bytes(column)
+    return columns
+
+
+def _is_candle_list(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(c, dict) and "open" in c for c in value)
+
+
+def _columnarize_field(key: str, value, typed: bool):
+    if key == "candles" and _is_candle_list(value):
+        return candles_to_columns(value, typed)
+    if key == "new_candle" and _is_candle_list([value]):
+        return candles_to_columns([value], typed)
+    return columnarize(value, typed)
+
+
+def columnarize(payload, typed: bool = False):
+    """Return a copy of payload with every "candles" list (and "new_candle") converted to columns"""
+    if isinstance(payload, dict):
+        return {key: _columnarize_field(key, value, typed) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [columnarize(item, typed) for item in payload]
+    return payload
+
+
+def candle_response(payload, fmt: str) -> Response:
+    """Encode a candle-carrying payload in the negotiated format"""
+    headers = {"Vary": "Accept"}
+    if fmt == FORMAT_COLUMNAR:
+        body = json.dumps(columnarize(payload), separators=(",", ":"))
+        return Response(content=body, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+    if fmt == FORMAT_MSGPACK and USE_MSGPACK:
+        body = msgpack.packb(columnarize(payload, typed=True), use_bin_type=True)
+        return Response(content=body, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
@@ -0,0 +1,136 @@
+"""
+Candle Series Pool - Real Market Replay
+Keeps ready-made candle series for every asset/timeframe so that starting
+a replay session is a pop from a queue instead of generating 100 candles
+on the request path.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from real_market import (
+    generate_realistic_candles, AVAILABLE_ASSETS, ASSET_BASE_PRICES,
+    VALID_TIMEFRAMES, Candle
+)
+
+logger = logging.getLogger(__name__)
+
+SESSION_CANDLES = 100
+
+
+class CandleSeriesPool:
+    """Background-refilled pool of candle series keyed by (asset, timeframe)"""
+
+    def __init__(self, target_size: int = 4, max_age_seconds: float = 300.0, num_candles: int = SESSION_CANDLES):
+        self.target_size = target_size
+        # Candle timestamps are anchored to generation time, so old series are dropped
+        self.max_age_seconds = max_age_seconds
+        self.num_candles = num_candles
+        self.keys: List[Tuple[str, str]] = [
+            (asset["id"], timeframe)
+            for asset in AVAILABLE_ASSETS
+            for timeframe in VALID_TIMEFRAMES
+        ]
+        self._series: Dict[Tuple[str, str], Deque[Tuple[float, List[Candle]]]] = {
+            key: deque() for key in self.keys
+        }
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.refills = 0
+        self.refill_seconds_total = 0.0
+        self.refill_seconds_max = 0.0
+        self.last_refill_seconds = 0.0
+
+    def pop(self, asset: str, timeframe: str) -> Optional[List[Candle]]:
+        """Take a ready series in O(1), or None if the pool has nothing fresh for this key"""
+        queue = self._series.get((asset, timeframe))
+        series = None
+        if queue is not None:
+            now = time.monotonic()
+            while queue:
+                created_at, candles = queue.popleft()
+                if now - created_at <= self.max_age_seconds:
+                    series = candles
+                    break
+                self.expired += 1
+
+        if series is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self._wakeup.set()
+        return series
+
+    def _generate(self, asset: str, timeframe: str) -> List[Candle]:
+        base_price = ASSET_BASE_PRICES.get(asset, 100)
+        return generate_realistic_candles(self.num_candles, base_price, timeframe)
+
+    async def refill(self):
+        """Drop expired series and top every key back up to the target size"""
+        for key in self.keys:
+            queue = self._series[key]
+            now = time.monotonic()
+            while queue and now - queue[0][0] > self.max_age_seconds:
+                queue.popleft()
+                self.expired += 1
+
+            while len(queue) < self.target_size:
+                started = time.perf_counter()
+                # Generate off the event loop so requests are never stalled by a refill
+                candles = await asyncio.to_thread(self._generate, *key)
+                elapsed = time.perf_counter() - started
+
+                queue.append((time.monotonic(), candles))
+                self.refills += 1
+                self.refill_seconds_total += elapsed
+                self.refill_seconds_max = max(self.refill_seconds_max, elapsed)
+                self.last_refill_seconds = elapsed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.error(f"Candle pool refill failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_age_seconds / 2)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            "expired": self.expired,
+            "refills": self.refills,
+            "refill_latency_ms": {
+                "last": round(self.last_refill_seconds * 1000, 3),
+                "avg": round(self.refill_seconds_total / self.refills * 1000, 3) if self.refills else 0.0,
+                "max": round(self.refill_seconds_max * 1000, 3),
+            },
+            "target_size": self.target_size,
+            "pool_sizes": {f"{asset}:{timeframe}": len(self._series[(asset, timeframe)]) for asset, timeframe in self.keys},
+        }
@@ -0,0 +1,253 @@
+"""
+Response Compression
+gzip/brotli content negotiation for API responses and static files.
+
+- CompressionMiddleware: compresses complete JSON/text responses of at least
+  COMPRESSION_MIN_SIZE bytes. Bodies of COMPRESSION_OFFLOAD_SIZE or more are
+  compressed in a worker thread to keep the event loop free. Responses with an
+  ETag (the http_cache static bodies) are compressed once per encoding and
+  reused. Streaming responses (NDJSON/SSE) and already encoded responses pass
+  through untouched.
+- PrecompressedStaticFiles: serves the .br/.gz siblings written at build time
+  next to each static file, and gives static files a Cache-Control header.
+
+brotli is optional; without it responses are gzip only.
+
+Usage:
+    python compression.py build [--dir PATH]
+    python compression.py check [--dir PATH]
+"""
+import os
+import sys
+import gzip
+import asyncio
+import argparse
+import mimetypes
+from pathlib import Path
+from typing import Iterable, Optional
+
+from cachetools import LRUCache
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+    USE_BROTLI = True
+except ImportError:
+    USE_BROTLI = False
+
+MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+OFFLOAD_SIZE = int(os.environ.get('COMPRESSION_OFFLOAD_SIZE', str(64 * 1024)))
+
+# Dynamic responses favour speed, build-time artifacts favour ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+BUILD_GZIP_LEVEL = 9
+BUILD_BROTLI_QUALITY = 11
+
+STATIC_DIR = Path(__file__).parent / "static"
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """Best of `available` (default: what this process can produce) for an Accept-Encoding header"""
+    if available is None:
+        available = ("br", "gzip") if USE_BROTLI else ("gzip",)
+    if not accept_encoding:
+        return None
+
+    accepted, wildcard = {}, None
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard = q
+        elif coding:
+            accepted[coding.lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in available:  # in preference order, so ties go to the earlier one
+        q = accepted.get(coding, wildcard or 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, build: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BUILD_BROTLI_QUALITY if build else BROTLI_QUALITY)
+    # mtime=0 keeps the output a pure function of the input
+    return gzip.compress(body, compresslevel=BUILD_GZIP_LEVEL if build else GZIP_LEVEL, mtime=0)
+
+
+# ==================== DYNAMIC RESPONSES ====================
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete, compressible responses"""
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE, offload_size: int = OFFLOAD_SIZE, max_cached: int = 512):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self._by_etag = LRUCache(maxsize=max_cached)  # (etag, encoding) -> compressed body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message  # held until the body shows whether to compress
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if (message.get("more_body")
+                    or len(body) < self.minimum_size
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await self._compress(body, encoding, headers.get("etag"))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"  # the bytes differ from the identity representation
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    async def _compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        key = (etag, encoding) if etag else None
+        if key is not None:
+            cached = self._by_etag.get(key)
+            if cached is not None:
+                return cached
+        if len(body) >= self.offload_size:
+            compressed = await asyncio.to_thread(compress, body, encoding)
+        else:
+            compressed = compress(body, encoding)
+        if key is not None:
+            self._by_etag[key] = compressed
+        return compressed
+
+
+# ==================== STATIC FILES ====================
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that prefers a build-time .br/.gz sibling when the client accepts it"""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if isinstance(response, FileResponse) and response.status_code == 200:
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), SUFFIXES)
+            sibling = f"{response.path}{SUFFIXES[encoding]}" if encoding else None
+            if sibling and os.path.isfile(sibling):
+                response = FileResponse(sibling, media_type=response.media_type, headers={
+                    "Content-Encoding": encoding,
+                    "Vary": "Accept-Encoding",
+                })
+        response.headers.setdefault("Cache-Control", STATIC_CACHE_CONTROL)
+        return response
+
+
+def _artifact_sources(directory: Path):
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.suffix not in (".br", ".gz") and is_compressible(mimetypes.guess_type(path.name)[0]):
+            yield path
+
+
+def _build_encodings():
+    return ("br", "gzip") if USE_BROTLI else ("gzip",)
+
+
+def build_artifacts(directory: Path = STATIC_DIR) -> dict:
+    """Write .br/.gz next to every compressible static file where that saves bytes"""
+    written, skipped = 0, 0
+    for path in _artifact_sources(directory):
+        body = path.read_bytes()
+        for encoding in _build_encodings():
+            target = path.with_name(path.name + SUFFIXES[encoding])
+            compressed = compress(body, encoding, build=True)
+            if len(body) < MIN_SIZE or len(compressed) >= len(body):
+                target.unlink(missing_ok=True)
+                skipped += 1
+                continue
+            target.write_bytes(compressed)
+            written += 1
+    return {"written": written, "skipped": skipped}
+
+
+def stale_artifacts(directory: Path = STATIC_DIR) -> list:
+    """Compressed siblings older than their source file"""
+    stale = []
+    for path in _artifact_sources(directory):
+        for suffix in SUFFIXES.values():
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime < path.stat().st_mtime:
+                stale.append(target)
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--dir", type=Path, default=STATIC_DIR, help=f"static directory (default {STATIC_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        summary = build_artifacts(args.dir)
+        encodings = "/".join(_build_encodings())
+        print(f"✅ Wrote {summary['written']} {encodings} artifacts in {args.dir} ({summary['skipped']} not worth compressing)")
+        return 0
+
+    stale = stale_artifacts(args.dir)
+    for path in stale:
+        print(f"STALE {path}")
+    print(f"{args.dir}: {'up to date' if not stale else f'{len(stale)} stale artifacts'}")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
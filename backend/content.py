@@ -0,0 +1,161 @@
+"""
+Content Loader
+Single access point for the large, code-resident content tables: lesson
+intros, category lessons, curriculum data, exercise configs and interactive
+exercises. Each content module is imported the first time it is needed, so a
+worker only pays parse time and memory for the content it actually serves.
+
+When an up-to-date content bundle exists (see content_bundle.py), lookups are
+served from the memory-mapped bundle and the content modules stay unloaded.
+"""
+import sys
+import importlib
+import threading
+from typing import Dict, List, Optional, Union
+
+from content_bundle import MISSING, open_bundle
+
+CONTENT_MODULES = (
+    "lesson_intros",
+    "category_lessons",
+    "curriculum_data",
+    "exercises_config",
+    "interactive_config",
+    "interactive_exercises",
+)
+
+_bundle = None
+_bundle_checked = False
+_bundle_lock = threading.Lock()
+
+
+def _module(name: str):
+    # importlib caches in sys.modules and serializes concurrent first imports
+    return importlib.import_module(name)
+
+
+def get_bundle():
+    """The shared content bundle, opened on first use (None when absent or stale)"""
+    global _bundle, _bundle_checked
+    if not _bundle_checked:
+        with _bundle_lock:
+            if not _bundle_checked:
+                _bundle = open_bundle()
+                _bundle_checked = True
+    return _bundle
+
+
+def _from_bundle(*key_parts):
+    bundle = get_bundle()
+    return bundle.get(*key_parts) if bundle is not None else MISSING
+
+
+def loaded_content_modules() -> List[str]:
+    """Which content modules this worker has loaded so far"""
+    return [name for name in CONTENT_MODULES if name in sys.modules]
+
+
+# ==================== LESSONS ====================
+
+def _content_html(kind: str, category_id: str, number: int, markdown: str) -> str:
+    """Pre-rendered HTML from the bundle, else rendered (and cached) on first access"""
+    html = _from_bundle("html", kind, category_id, number)
+    if html is not MISSING:
+        return html
+    from markdown_render import render_markdown
+    return render_markdown(markdown)
+
+
+def get_lesson_intro(category_id: str, level: int, html: bool = False) -> dict:
+    intro = _from_bundle("intro", category_id, level)
+    if intro is MISSING and get_bundle() is not None:
+        intro = {"has_intro": False, "category_id": category_id, "level": level}  # the bundle holds every intro
+    elif intro is MISSING:
+        intro = _module("lesson_intros").get_lesson_intro(category_id, level)
+    if html and intro.get("has_intro"):
+        intro = {**intro, "content_html": _content_html("intro", category_id, level, intro.get("content", ""))}
+    return intro
+
+
+def get_category_lesson(category_id: str, html: bool = False) -> dict:
+    lesson = _from_bundle("lesson", category_id)
+    if lesson is MISSING and get_bundle() is not None:
+        lesson = {"has_lesson": False, "category_id": category_id}
+    elif lesson is MISSING:
+        lesson = _module("category_lessons").get_category_lesson(category_id)
+    if html and lesson.get("has_lesson"):
+        lesson = {**lesson, "pages": [
+            {**page, "content_html": _content_html("page", category_id, page["page"], page.get("content", ""))}
+            for page in lesson.get("pages", [])
+        ]}
+    return lesson
+
+
+def get_lesson_page(category_id: str, page_number: int, html: bool = False) -> dict:
+    page = _from_bundle("page", category_id, page_number)
+    if page is MISSING:
+        page = _module("category_lessons").get_lesson_page(category_id, page_number)
+    if html and page.get("has_lesson"):
+        page = {**page, "content_html": _content_html("page", category_id, page_number, page.get("content", ""))}
+    return page
+
+
+# ==================== CURRICULUM EXERCISES ====================
+
+def get_config_exercises(category_id: str, level: int) -> Optional[List[Dict]]:
+    """Hand-written exercises from exercises_config.py, if any"""
+    exercises = _from_bundle("config_exercises", category_id, level)
+    if exercises is not MISSING:
+        return exercises
+    if get_bundle() is not None:
+        return []  # the bundle holds every configured level
+    return _module("exercises_config").get_exercises(category_id, level)
+
+
+def get_level_data(category_id: str, level: int) -> Optional[list]:
+    """Text question tuples from curriculum_data.py"""
+    level_data = _from_bundle("level_data", category_id, level)
+    if level_data is not MISSING:
+        return level_data
+    if get_bundle() is not None:
+        return None
+    return _module("curriculum_data").get_exercises_for_level(category_id, level)
+
+
+def get_image_questions(category_id: str, level: int) -> List[Dict]:
+    questions = _from_bundle("image_questions", category_id, level)
+    if questions is not MISSING:
+        return questions
+    if get_bundle() is not None:
+        return []
+    return _module("curriculum_data").IMAGE_QUESTIONS.get(category_id, {}).get(level, [])
+
+
+# ==================== INTERACTIVE EXERCISES ====================
+
+def get_interactive_exercises(category_id: str, level: int, seed: Optional[int] = None) -> List[Dict]:
+    return _module("interactive_exercises").get_interactive_exercises(category_id, level, seed)
+
+
+def find_interactive_exercise(exercise_id: str, category_id: str, level: int, seed: Optional[int] = None) -> Optional[Dict]:
+    return _module("interactive_exercises").find_interactive_exercise(exercise_id, category_id, level, seed)
+
+
+def pack_scenarios(exercises: List[Dict]) -> Union[Dict, List[Dict]]:
+    return _module("interactive_exercises").pack_scenarios(exercises)
+
+
+def unpack_scenarios(payload) -> List[Dict]:
+    return _module("interactive_exercises").unpack_scenarios(payload)
+
+
+def interactive_config_version() -> str:
+    return _module("interactive_exercises").CONFIG_VERSION
+
+
+def validate_click_answer(*args, **kwargs) -> Dict:
+    return _module("interactive_exercises").validate_click_answer(*args, **kwargs)
+
+
+def validate_click_answers(*args, **kwargs) -> List[Dict]:
+    return _module("interactive_exercises").validate_click_answers(*args, **kwargs)
@@ -0,0 +1,233 @@
+"""
+Content Bundle
+Compiles the code-resident curriculum content into one packed file that every
+worker memory-maps, so the content is parsed once at build time and shared
+through the page cache instead of living as dict literals in each process.
+
+File layout:
+    MAGIC (4 bytes) | format version (u16) | header length (u32)
+    header: MessagePack {"built_at", "sources": {file: sha256}, "index": {key: [offset, length]}}
+    records: one MessagePack value per key, located by the index
+
+Keys:
+    intro/<category>/<level>            -> get_lesson_intro()
+    lesson/<category>                   -> get_category_lesson()
+    page/<category>/<page>              -> get_lesson_page()
+    level_data/<category>/<level>       -> curriculum_data text question tuples
+    image_questions/<category>/<level>  -> curriculum_data image questions
+    config_exercises/<category>/<level> -> exercises_config.get_exercises()
+    html/intro/<category>/<level>       -> rendered intro content
+    html/page/<category>/<page>         -> rendered lesson page content
+
+Usage:
+    python content_bundle.py build [--output PATH]
+    python content_bundle.py check [--output PATH]
+"""
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import msgpack
+    USE_MSGPACK = True
+except ImportError:
+    USE_MSGPACK = False
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_BUNDLE_PATH = BACKEND_DIR / "content.bundle"
+
+MAGIC = b"TLCB"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sHI")
+
+# Content modules baked into the bundle; the bundle is stale when any of them changes
+SOURCE_FILES = (
+    "lesson_intros.py",
+    "category_lessons.py",
+    "curriculum_data.py",
+    "exercises_config.py",
+    "markdown_render.py",
+)
+
+MISSING = object()
+
+
+def bundle_path() -> Path:
+    return Path(os.environ.get("CONTENT_BUNDLE", DEFAULT_BUNDLE_PATH))
+
+
+def make_key(*parts) -> str:
+    return "/".join(str(part) for part in parts)
+
+
+def source_hashes() -> Dict[str, str]:
+    return {
+        name: hashlib.sha256((BACKEND_DIR / name).read_bytes()).hexdigest()
+        for name in SOURCE_FILES
+    }
+
+
+# ==================== BUILD ====================
+
+def collect_content() -> Dict[str, object]:
+    """Every bundle key and its value, computed from the content modules"""
+    from lesson_intros import LESSON_INTROS, get_lesson_intro
+    from category_lessons import CATEGORY_LESSONS, get_category_lesson, get_lesson_page
+    from curriculum_data import CURRICULUM_DATA, IMAGE_QUESTIONS
+    from exercises_config import EXERCISES_BY_CATEGORY, get_exercises
+    from markdown_render import render_markdown
+
+    records = {}
+    for category_id, levels in LESSON_INTROS.items():
+        for level in levels:
+            intro = get_lesson_intro(category_id, level)
+            records[make_key("intro", category_id, level)] = intro
+            records[make_key("html", "intro", category_id, level)] = render_markdown(intro.get("content", ""))
+
+    for category_id, lesson in CATEGORY_LESSONS.items():
+        records[make_key("lesson", category_id)] = get_category_lesson(category_id)
+        for page in lesson.get("pages", []):
+            records[make_key("page", category_id, page["page"])] = get_lesson_page(category_id, page["page"])
+            records[make_key("html", "page", category_id, page["page"])] = render_markdown(page.get("content", ""))
+
+    for category_id, levels in CURRICULUM_DATA.items():
+        for level, level_data in levels.items():
+            records[make_key("level_data", category_id, level)] = [list(row) for row in level_data]
+
+    for category_id in IMAGE_QUESTIONS:
+        for level, questions in IMAGE_QUESTIONS[category_id].items():
+            records[make_key("image_questions", category_id, level)] = questions
+
+    for category_id, levels in EXERCISES_BY_CATEGORY.items():
+        for level in levels:
+            records[make_key("config_exercises", category_id, level)] = get_exercises(category_id, level)
+
+    return records
+
+
+def build_bundle(path: Optional[Path] = None) -> dict:
+    """Write the bundle atomically and return a summary"""
+    path = Path(path or bundle_path())
+    records = collect_content()
+
+    index = {}
+    blobs = []
+    offset = 0
+    for key in sorted(records):
+        blob = msgpack.packb(records[key], use_bin_type=True)
+        index[key] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = msgpack.packb({
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "sources": source_hashes(),
+        "index": index,
+    }, use_bin_type=True)
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+    return {"path": str(path), "records": len(index), "bytes": path.stat().st_size}
+
+
+# ==================== READ ====================
+
+class ContentBundle:
+    """Read-only, memory-mapped view of a built bundle"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} content bundle")
+
+        header = msgpack.unpackb(self._mm[PREAMBLE.size:PREAMBLE.size + header_len], raw=False)
+        self.built_at = header["built_at"]
+        self.sources = header["sources"]
+        self._index = header["index"]
+        self._data_start = PREAMBLE.size + header_len
+
+    def __len__(self):
+        return len(self._index)
+
+    def is_fresh(self) -> bool:
+        return self.sources == source_hashes()
+
+    def get(self, *key_parts, default=MISSING):
+        """Decode one record straight from the mapped file"""
+        entry = self._index.get(make_key(*key_parts))
+        if entry is None:
+            return default
+        offset, length = entry
+        start = self._data_start + offset
+        return msgpack.unpackb(self._mm[start:start + length], raw=False)
+
+    def close(self):
+        self._mm.close()
+
+
+def open_bundle(path: Optional[Path] = None) -> Optional[ContentBundle]:
+    """Open the bundle if it exists and matches the current sources, else None"""
+    if not USE_MSGPACK:
+        return None
+    path = Path(path or bundle_path())
+    if not path.exists():
+        return None
+    try:
+        bundle = ContentBundle(path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning(f"Ignoring unreadable content bundle {path}: {e}")
+        return None
+    if not bundle.is_fresh():
+        logger.warning(f"Ignoring stale content bundle {path}; rebuild with: python content_bundle.py build")
+        bundle.close()
+        return None
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--output", type=Path, default=None, help=f"bundle path (default {DEFAULT_BUNDLE_PATH})")
+    args = parser.parse_args()
+
+    if not USE_MSGPACK:
+        print("msgpack is not installed")
+        return 1
+
+    if args.command == "build":
+        summary = build_bundle(args.output)
+        print(f"✅ Wrote {summary['records']} records ({summary['bytes']} bytes) to {summary['path']}")
+        return 0
+
+    path = Path(args.output or bundle_path())
+    if not path.exists():
+        print(f"No bundle at {path}")
+        return 1
+    bundle = ContentBundle(path)
+    fresh = bundle.is_fresh()
+    print(f"{path}: {len(bundle)} records, built {bundle.built_at}, {'up to date' if fresh else 'STALE'}")
+    return 0 if fresh else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,15 @@
 TradeLingo Curriculum Generator
 Generates Duolingo-style trading education content using AI
 """
-import os
 import json
-import uuid
 import asyncio
-from typing import List, Dict, Optional
+from types import MappingProxyType
+from typing import AsyncIterator, List, Dict, Mapping, Optional, Tuple
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from curriculum_data import CURRICULUM_DATA
+import content
+import llm_client
+from json_stream import JSONArrayStreamParser
 
 load_dotenv()
 
@@ -555,26 +555,30 @@ RULES:
 OUTPUT: Return ONLY a valid JSON array of 10 exercise objects, no other text."""
 
 
+SYSTEM_MESSAGE = "You are an expert trading curriculum designer. Always respond with valid JSON only."
+
+
+def add_exercise_metadata(ex: Dict, index: int, category_id: str, level: int) -> Dict:
+    """Fill in the id, XP and placeholder image of an AI-generated exercise"""
+    ex['id'] = f"{category_id}-L{level}-E{index+1}"
+    ex['category_id'] = category_id
+    ex['level'] = level
+    ex['xp_reward'] = 5 + (level * 2)  # 7-25 XP based on level
+    # Add placeholder image
+    images = CHART_IMAGES.get(category_id, CHART_IMAGES['default'])
+    ex['image_url'] = images[index % len(images)]
+    return ex
+
+
 async def generate_exercises_with_ai(category_id: str, category_name: str, level: int) -> List[Dict]:
     """Generate exercises using AI"""
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
+        if not llm_client.is_available():
             print(f"No API key found, using fallback exercises for {category_name} level {level}")
             return generate_fallback_exercises(category_id, category_name, level)
         
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"curriculum-{category_id}-{level}-{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert trading curriculum designer. Always respond with valid JSON only."
-        ).with_model("openai", "gpt-4.1-mini")
-        
         prompt = get_category_prompt(category_id, category_name, level)
-        user_message = UserMessage(text=prompt)
-        
-        response = await chat.send_message(user_message)
+        response = await llm_client.complete(prompt, SYSTEM_MESSAGE, session_hint=f"curriculum-{category_id}-{level}")
         
         # Parse JSON response
         try:
@@ -587,21 +591,19 @@ async def generate_exercises_with_ai(category_id: str, category_name: str, level
             cleaned = cleaned.strip()
             
             exercises = json.loads(cleaned)
+            if not isinstance(exercises, list) or not all(isinstance(ex, dict) for ex in exercises):
+                raise ValueError("expected a JSON array of exercise objects")
             
             # Add metadata to each exercise
             for i, ex in enumerate(exercises):
-                ex['id'] = f"{category_id}-L{level}-E{i+1}"
-                ex['category_id'] = category_id
-                ex['level'] = level
-                ex['xp_reward'] = 5 + (level * 2)  # 7-25 XP based on level
-                # Add placeholder image
-                images = CHART_IMAGES.get(category_id, CHART_IMAGES['default'])
-                ex['image_url'] = images[i % len(images)]
+                add_exercise_metadata(ex, i, category_id, level)
             
             return exercises
             
-        except json.JSONDecodeError as e:
+        except (ValueError, KeyError, TypeError) as e:  # JSONDecodeError is a ValueError
+            # A malformed reply would be served from the cache forever; drop it
             print(f"JSON parse error for {category_name} level {level}: {e}")
+            llm_client.discard(prompt, SYSTEM_MESSAGE)
             return generate_fallback_exercises(category_id, category_name, level)
             
     except Exception as e:
@@ -609,13 +611,41 @@ async def generate_exercises_with_ai(category_id: str, category_name: str, level
         return generate_fallback_exercises(category_id, category_name, level)
 
 
+async def stream_exercises_with_ai(category_id: str, category_name: str, level: int) -> AsyncIterator[Dict]:
+    """Yield AI-generated exercises one by one as the LLM response is parsed.
+
+    Stops early when no provider is available, the stream breaks or the reply
+    is malformed; a reply short of 10 exercises is dropped from the response
+    cache. Callers complete a short set themselves.
+    """
+    if not llm_client.is_available():
+        return
+
+    prompt = get_category_prompt(category_id, category_name, level)
+    parser = JSONArrayStreamParser()
+    count = 0
+    try:
+        async for chunk in llm_client.stream(prompt, SYSTEM_MESSAGE, session_hint=f"curriculum-{category_id}-{level}"):
+            for ex in parser.feed(chunk):
+                if not isinstance(ex, dict):
+                    raise ValueError("expected a JSON array of exercise objects")
+                yield add_exercise_metadata(ex, count, category_id, level)
+                count += 1
+            if parser.finished:
+                break
+    except Exception as e:
+        print(f"AI streaming error for {category_name} level {level}: {e}")
+
+    if count < 10:
+        llm_client.discard(prompt, SYSTEM_MESSAGE)
+
+
 def generate_fallback_exercises(category_id: str, category_name: str, level: int) -> List[Dict]:
     """Generate exercises using the easy-to-edit exercises_config.py file"""
     
     # PRIMEIRO: Tenta usar o arquivo exercises_config.py (fácil de editar)
     try:
-        from exercises_config import get_exercises
-        custom_exercises = get_exercises(category_id, level)
+        custom_exercises = content.get_config_exercises(category_id, level)
         if custom_exercises and len(custom_exercises) > 0:
             return custom_exercises
     except ImportError:
@@ -625,17 +655,13 @@ def generate_fallback_exercises(category_id: str, category_name: str, level: int
     exercises = []
     
     # Get data for this category and level from CURRICULUM_DATA
-    category_data = CURRICULUM_DATA.get(category_id)
-    
-    if category_data and level in category_data:
-        level_data = category_data[level]
-    else:
+    level_data = content.get_level_data(category_id, level)
+    if level_data is None:
         # Use candlesticks level 1 as default fallback
-        level_data = CURRICULUM_DATA.get("candlesticks", {}).get(1, [])
+        level_data = content.get_level_data("candlesticks", 1) or []
     
     # Get image questions for this category and level
-    from curriculum_data import IMAGE_QUESTIONS
-    image_questions = IMAGE_QUESTIONS.get(category_id, {}).get(level, [])
+    image_questions = content.get_image_questions(category_id, level)
     
     for i in range(10):
         exercise_num = i + 1
@@ -713,8 +739,33 @@ def get_level_image(category_id: str, level: int, exercise_index: int) -> str:
     return images[index]
 
 
-def get_all_categories() -> List[Dict]:
-    """Get flat list of all categories with metadata"""
+def _freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _to_json_bytes(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _compile_catalog():
+    """Flatten and sort CURRICULUM_STRUCTURE once, at import"""
+    tiers = sorted(
+        (
+            {
+                "id": tier_id,
+                "name": tier_data['name'],
+                "order": tier_data['order'],
+                "categories": tier_data['categories']
+            }
+            for tier_id, tier_data in CURRICULUM_STRUCTURE.items()
+        ),
+        key=lambda x: x['order']
+    )
     categories = []
     for tier_id, tier_data in CURRICULUM_STRUCTURE.items():
         for cat in tier_data['categories']:
@@ -726,12 +777,30 @@ def get_all_categories() -> List[Dict]:
                 "total_levels": 10,
                 "total_exercises": 100
             })
-    return sorted(categories, key=lambda x: x['order'])
+    categories.sort(key=lambda x: x['order'])
+    return tiers, categories
+
+
+_tiers, _categories = _compile_catalog()
+
+# Frozen catalog: shared by every request, so nothing may mutate it
+CURRICULUM_TIERS = _freeze(_tiers)
+CURRICULUM_CATEGORIES = _freeze(_categories)
+CATEGORY_INDEX = MappingProxyType({cat['id']: cat for cat in CURRICULUM_CATEGORIES})
+
+# Pre-serialized response bodies
+CURRICULUM_TIERS_JSON = _to_json_bytes(_tiers)
+CURRICULUM_CATEGORIES_JSON = _to_json_bytes(_categories)
+CATEGORY_JSON = MappingProxyType({cat['id']: _to_json_bytes(cat) for cat in _categories})
+
+del _tiers, _categories
+
+
+def get_all_categories() -> Tuple[Mapping, ...]:
+    """Get flat list of all categories with metadata"""
+    return CURRICULUM_CATEGORIES
 
 
-def get_category_by_id(category_id: str) -> Optional[Dict]:
+def get_category_by_id(category_id: str) -> Optional[Mapping]:
     """Get a specific category by ID"""
-    for cat in get_all_categories():
-        if cat['id'] == category_id:
-            return cat
-    return None
+    return CATEGORY_INDEX.get(category_id)
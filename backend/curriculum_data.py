@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 # ==================== IMAGE-BASED QUESTIONS ====================
 # These are "choose the correct image" questions
 # Format: Each level has 5 image questions (exercises 2, 4, 6, 8, 10)
@@ -851,34 +853,57 @@ CANDLESTICKS_IMAGES = {
         },
     ],
     # Levels 2-10 use generated questions - EDIT THESE!
-    **{level: generate_image_questions_for_level("candlesticks", level) for level in range(2, 11)}
 }
 
-# ==================== MARKET STRUCTURE IMAGE QUESTIONS ====================
-MARKET_STRUCTURE_IMAGES = {level: generate_image_questions_for_level("market-structure", level) for level in range(1, 11)}
+# ==================== OTHER CATEGORIES ====================
+# No custom image questions yet: every level uses generated questions.
+# Add levels to these dicts the same way as CANDLESTICKS_IMAGES.
+MARKET_STRUCTURE_IMAGES = {}
+LIQUIDITY_IMAGES = {}
+BOS_IMAGES = {}
+CHOCH_IMAGES = {}
+ORDER_BLOCKS_IMAGES = {}
+FVG_IMAGES = {}
+LIQUIDITY_SWEEPS_IMAGES = {}
+PREMIUM_DISCOUNT_IMAGES = {}
+INDUCEMENT_IMAGES = {}
+MULTI_TIMEFRAME_IMAGES = {}
+ENTRY_MODELS_IMAGES = {}
+RISK_MANAGEMENT_IMAGES = {}
+PSYCHOLOGY_IMAGES = {}
+
 
-# ==================== LIQUIDITY IMAGE QUESTIONS ====================
-LIQUIDITY_IMAGES = {level: generate_image_questions_for_level("liquidity", level) for level in range(1, 11)}
+class LazyImageQuestions(Mapping):
+    """category_id -> {level: questions}, built the first time a category is read.
 
-# ==================== BOS IMAGE QUESTIONS ====================
-BOS_IMAGES = {level: generate_image_questions_for_level("bos", level) for level in range(1, 11)}
+    Levels missing from a category's custom dict are filled with
+    generate_image_questions_for_level.
+    """
 
-# ==================== CHOCH IMAGE QUESTIONS ====================
-CHOCH_IMAGES = {level: generate_image_questions_for_level("choch", level) for level in range(1, 11)}
+    def __init__(self, custom_questions: dict):
+        self._custom = custom_questions
+        self._built = {}
+
+    def __getitem__(self, category_id):
+        levels = self._built.get(category_id)
+        if levels is None:
+            custom = self._custom[category_id]
+            levels = {
+                level: custom.get(level) or generate_image_questions_for_level(category_id, level)
+                for level in range(1, 11)
+            }
+            self._built[category_id] = levels
+        return levels
+
+    def __iter__(self):
+        return iter(self._custom)
+
+    def __len__(self):
+        return len(self._custom)
 
-# ==================== OTHER CATEGORIES ====================
-ORDER_BLOCKS_IMAGES = {level: generate_image_questions_for_level("order-blocks", level) for level in range(1, 11)}
-FVG_IMAGES = {level: generate_image_questions_for_level("fvg", level) for level in range(1, 11)}
-LIQUIDITY_SWEEPS_IMAGES = {level: generate_image_questions_for_level("liquidity-sweeps", level) for level in range(1, 11)}
-PREMIUM_DISCOUNT_IMAGES = {level: generate_image_questions_for_level("premium-discount", level) for level in range(1, 11)}
-INDUCEMENT_IMAGES = {level: generate_image_questions_for_level("inducement", level) for level in range(1, 11)}
-MULTI_TIMEFRAME_IMAGES = {level: generate_image_questions_for_level("multi-timeframe", level) for level in range(1, 11)}
-ENTRY_MODELS_IMAGES = {level: generate_image_questions_for_level("entry-models", level) for level in range(1, 11)}
-RISK_MANAGEMENT_IMAGES = {level: generate_image_questions_for_level("risk-management", level) for level in range(1, 11)}
-PSYCHOLOGY_IMAGES = {level: generate_image_questions_for_level("psychology", level) for level in range(1, 11)}
 
 # Master mapping of all IMAGE questions
-IMAGE_QUESTIONS = {
+IMAGE_QUESTIONS = LazyImageQuestions({
     "candlesticks": CANDLESTICKS_IMAGES,
     "market-structure": MARKET_STRUCTURE_IMAGES,
     "liquidity": LIQUIDITY_IMAGES,
@@ -893,4 +918,4 @@ IMAGE_QUESTIONS = {
     "entry-models": ENTRY_MODELS_IMAGES,
     "risk-management": RISK_MANAGEMENT_IMAGES,
     "psychology": PSYCHOLOGY_IMAGES,
-}
+})
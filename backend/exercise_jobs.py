@@ -0,0 +1,101 @@
+"""
+AI Exercise Generation Queue
+Generates curriculum exercises in the background so a cache miss never waits
+on a full LLM round trip. Jobs are keyed by cache key, so a level is never
+queued twice, and a fixed number of workers bounds LLM concurrency.
+"""
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class ExerciseJobQueue:
+    """Bounded queue of (category, level) generation jobs with a small worker pool"""
+
+    def __init__(self, run_job: Callable[[str, str, int], Awaitable[None]], concurrency: int = 2, max_queue: int = 500):
+        self.run_job = run_job
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, dict] = {}
+        self._workers: List[asyncio.Task] = []
+
+    @staticmethod
+    def job_key(category_id: str, level: int) -> str:
+        return f"{category_id}-level-{level}"
+
+    def enqueue(self, category_id: str, category_name: str, level: int) -> Optional[dict]:
+        """Queue a level for generation unless it is already queued or running.
+
+        Returns the job status, or None if the queue is full.
+        """
+        key = self.job_key(category_id, level)
+        job = self._jobs.get(key)
+        if job and job["status"] in (JOB_QUEUED, JOB_RUNNING):
+            return job
+
+        new_job = {
+            "key": key,
+            "category_id": category_id,
+            "category_name": category_name,
+            "level": level,
+            "status": JOB_QUEUED,
+            "error": None,
+            "enqueued_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        try:
+            self._queue.put_nowait(new_job)
+        except asyncio.QueueFull:
+            logger.warning(f"Exercise job queue full, not queueing {key}")
+            return None
+        self._jobs[key] = new_job
+        return new_job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+            try:
+                await self.run_job(job["category_id"], job["category_name"], job["level"])
+                job["status"] = JOB_DONE
+            except Exception as e:
+                logger.error(f"Exercise job {job['key']} failed: {e}")
+                job["status"] = JOB_FAILED
+                job["error"] = str(e)
+            finally:
+                job["finished_at"] = time.time()
+                self._queue.task_done()
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get(self, category_id: str, level: int) -> Optional[dict]:
+        return self._jobs.get(self.job_key(category_id, level))
+
+    def summary(self) -> dict:
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": self._queue.qsize(),
+            "counts": counts,
+            "jobs": sorted(self._jobs.values(), key=lambda j: j["enqueued_at"]),
+        }
@@ -0,0 +1,71 @@
+"""
+HTTP Conditional Caching
+For responses that are pure functions of code-resident data: the body is
+serialized and hashed once, then served with an ETag and Cache-Control, and
+answered with 304 Not Modified when the client already holds that version.
+"""
+import json
+import hashlib
+from typing import Callable, Hashable, Optional
+
+from cachetools import LRUCache
+from fastapi.responses import Response
+
+STATIC_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=86400"
+
+
+def json_bytes(content) -> bytes:
+    """Serialize exactly like Starlette's JSONResponse"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class StaticBody:
+    """A response body with its content-hash ETag, computed once"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        # Weak: the compressed representations share the same validator
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_content(cls, content) -> "StaticBody":
+        return cls(json_bytes(content))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_response(static: StaticBody, if_none_match: Optional[str], cache_control: str = STATIC_CACHE_CONTROL) -> Response:
+    """200 with the body, or an empty 304 when the client's copy is current"""
+    headers = {"ETag": static.etag, "Cache-Control": cache_control}
+    if etag_matches(if_none_match, static.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=static.body, media_type="application/json", headers=headers)
+
+
+class StaticBodyCache:
+    """Memoizes StaticBody per key for parametrized routes (bounded, since keys come from URLs)"""
+
+    def __init__(self, maxsize: int = 2048):
+        self._bodies = LRUCache(maxsize=maxsize)
+
+    def get(self, key: Hashable, build: Callable[[], object]) -> StaticBody:
+        static = self._bodies.get(key)
+        if static is None:
+            static = self._bodies[key] = StaticBody.from_content(build())
+        return static
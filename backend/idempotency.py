@@ -0,0 +1,207 @@
+"""
+Idempotency Keys
+Lets clients retry XP-awarding submissions safely. A request carrying an
+Idempotency-Key header runs once; a retry with the same key gets the stored
+result back without running the request again, and a retry that arrives
+while the first attempt is still running waits for its result.
+
+A key belongs to the request it first came with: reusing it for a different
+route or body is rejected with 422. Failed attempts are not stored, so the
+client may retry them with the same key. A retry waiting on an attempt that
+fails gets the same error, or a 409 asking it to retry when the attempt was
+cancelled; one waiting on another worker's attempt runs the request itself.
+
+Keys are shared by every worker through the idempotency_keys table, the same
+way CacheRowLease shares exercise generation: the worker that inserts the
+key's row (unique key, request fingerprint, no response yet) runs the
+request and then stores the response on that row. Other workers poll the row
+until the response is there, for at most max_wait_seconds before answering
+503 with Retry-After; a row left without one for longer than the lease is
+taken over with a compare-and-swap on created_at, so a crashed worker never
+wedges a key. Stored responses are replayed for `ttl` seconds. Insert errors
+other than losing the race on the unique key are raised. Each worker deletes
+rows older than the TTL at most every PURGE_INTERVAL seconds, when it claims
+a new key.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+
+from single_flight import is_unique_violation
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+PURGE_INTERVAL = 600
+
+
+def request_fingerprint(request) -> str:
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _age_seconds(timestamp: str) -> float:
+    created = datetime.fromisoformat(timestamp)
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created).total_seconds()
+
+
+def _retry_later() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="The original request with this Idempotency-Key did not complete, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+def _still_running() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="The original request with this Idempotency-Key is still running, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+class IdempotencyStore:
+    """Results by Idempotency-Key, shared by every worker through the idempotency_keys table"""
+
+    def __init__(self, client, table: str = 'idempotency_keys', ttl: float = 24 * 3600,
+                 lease_seconds: float = 60.0, poll_seconds: float = 0.25, max_wait_seconds: float = 30.0):
+        self.client = client
+        self.table = table
+        self.ttl = ttl
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._purged_at = 0.0
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}  # retries reaching this worker wait here
+
+    async def run(self, key: Optional[str], request, func: Callable[[], Awaitable], response: Optional[Response] = None):
+        """func()'s result, computed once per key; `request` identifies what the key was issued for"""
+        if key is None:
+            return await func()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        fingerprint = request_fingerprint(request)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            stored_fingerprint, future = in_flight
+            if stored_fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            # shield: a retry going away must not cancel the original attempt
+            result = await asyncio.shield(future)
+            replayed = True
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = (fingerprint, future)
+            try:
+                result, replayed = await self._run_once(key, fingerprint, func)
+            except asyncio.CancelledError:
+                future.set_exception(_retry_later())
+                future.exception()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else was waiting
+                raise
+            else:
+                future.set_result(result)
+            finally:
+                del self._in_flight[key]
+
+        if replayed and response is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+        return result
+
+    async def _run_once(self, key: str, fingerprint: str, func: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """(result, whether it was replayed from the table)"""
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            stamp, existing = self._try_claim(key, fingerprint)
+            if stamp:
+                break
+            if existing is not None:
+                if existing['fingerprint'] != fingerprint:
+                    raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+                if existing.get('completed_at'):
+                    return existing.get('response'), True
+            if time.monotonic() >= deadline:
+                raise _still_running()
+            await asyncio.sleep(self.poll_seconds)
+
+        try:
+            result = await func()
+        except BaseException:
+            self._release(key, stamp)
+            raise
+        self._complete(key, stamp, result)
+        return result, False
+
+    def _try_claim(self, key: str, fingerprint: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Returns (stamp if this worker now owns the key, the key's live row otherwise)"""
+        stamp = datetime.now(timezone.utc).isoformat()
+        result = self.client.table(self.table).select('*').eq('key', key).execute()
+        existing = result.data[0] if result.data else None
+
+        if existing is None:
+            self._purge_expired()
+            try:
+                self.client.table(self.table).insert({"key": key, "fingerprint": fingerprint, "created_at": stamp}).execute()
+                return stamp, None
+            except Exception as e:
+                if not is_unique_violation(e):
+                    raise
+                # Lost the insert race on the unique key
+                return None, None
+
+        limit = self.ttl if existing.get('completed_at') else self.lease_seconds
+        if _age_seconds(existing['created_at']) < limit:
+            return None, existing
+
+        # Expired response or abandoned attempt: only one worker can swap the old created_at for its own
+        taken = self.client.table(self.table).update({
+            "fingerprint": fingerprint,
+            "response": None,
+            "completed_at": None,
+            "created_at": stamp
+        }).eq('key', key).eq('created_at', existing['created_at']).execute()
+        return (stamp, None) if taken.data else (None, None)
+
+    def _purge_expired(self):
+        """Delete keys past their TTL; keys are rarely reused, so expired rows are not replaced"""
+        now = time.monotonic()
+        if now - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = now
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.ttl)).isoformat()
+        try:
+            self.client.table(self.table).delete().lt('created_at', cutoff).execute()
+        except Exception as e:
+            logger.error(f"Could not purge expired idempotency keys: {e}")
+
+    def _complete(self, key: str, stamp: str, result):
+        try:
+            self.client.table(self.table).update({
+                "response": jsonable_encoder(result),
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }).eq('key', key).eq('created_at', stamp).execute()
+        except Exception as e:
+            # The request already ran; a retry will run it again rather than fail this one
+            logger.error(f"Could not store the response for Idempotency-Key {key}: {e}")
+
+    def _release(self, key: str, stamp: str):
+        """Drop our row after a failed attempt so the next retry runs the request"""
+        try:
+            self.client.table(self.table).delete().eq('key', key).eq('created_at', stamp).execute()
+        except Exception as e:
+            logger.error(f"Could not release Idempotency-Key {key}: {e}")
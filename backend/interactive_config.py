@@ -10,6 +10,10 @@
 # ║  2. Execute: curl -X DELETE .../api/interactive/exercises/cache              ║
 # ║  3. Execute: sudo supervisorctl restart backend                              ║
 # ║                                                                              ║
+# ║  OBS: por padrão os gráficos são gerados automaticamente                     ║
+# ║  (scenario_generator.py). Estes cenários só são usados com                   ║
+# ║  PROCEDURAL_SCENARIOS=false.                                                 ║
+# ║                                                                              ║
 # ╚══════════════════════════════════════════════════════════════════════════════╝
 
 
@@ -2,9 +2,16 @@
 Interactive Chart Exercise System - SMC Edition
 TradeLingo - Hands-on Trading Education with Repetition
 """
+import os
 import uuid
+import json
 import random
-from typing import List, Dict, Optional
+import hashlib
+from typing import List, Dict, Optional, Union
+
+import numpy as np
+
+from scenario_generator import generate_scenarios
 
 # ============================================================
 # IMPORTAR CONFIG EDITÁVEL
@@ -24,6 +31,17 @@ try:
 except ImportError:
     USE_CONFIG = False
 
+# Synthesize fresh, verified charts for every exercise instead of cycling
+# through the hand-written scenarios below / in interactive_config.py
+PROCEDURAL_SCENARIOS = os.environ.get("PROCEDURAL_SCENARIOS", "true").lower() == "true"
+
+
+def pick_scenarios(kind: str, fixtures: List[Dict], rng: random.Random, count: int = 10) -> List[Dict]:
+    """Scenarios for one level: procedural when enabled, else the fixtures"""
+    if PROCEDURAL_SCENARIOS:
+        return generate_scenarios(kind, count, rng)
+    return fixtures
+
 # ============================================================
 # CHART SCENARIOS - Multiple examples for repetition learning
 # ============================================================
@@ -291,18 +309,16 @@ PREMIUM_DISCOUNT_SCENARIOS = [
 # EXERCISE GENERATORS BY CATEGORY
 # ============================================================
 
-def generate_candlestick_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_candlestick_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate OHLC identification exercises with repetition"""
     exercises = []
     targets = ["open", "close", "high", "low"]
     
-    # Use config file if available, otherwise use built-in scenarios
-    if USE_CONFIG:
-        scenarios = CANDLES_OHLC.copy()
-    else:
-        scenarios = CANDLE_SCENARIOS.copy()
+    # Procedural single candles, or the config file / built-in ones
+    scenarios = pick_scenarios("candle", CANDLES_OHLC if USE_CONFIG else CANDLE_SCENARIOS, rng)
+    scenarios = [scenario["candles"][0] if "candles" in scenario else scenario for scenario in scenarios]
     
-    random.shuffle(scenarios)
+    rng.shuffle(scenarios)
     
     for i in range(10):
         candle = scenarios[i % len(scenarios)]
@@ -361,12 +377,11 @@ def generate_candlestick_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_swing_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_swing_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate swing point identification exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_SWING_SCENARIOS if USE_CONFIG else SWING_SCENARIOS
+    scenarios = pick_scenarios("swing", CONFIG_SWING_SCENARIOS if USE_CONFIG else SWING_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -415,12 +430,11 @@ def generate_swing_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_liquidity_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_liquidity_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate liquidity zone identification exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_LIQUIDITY_SCENARIOS if USE_CONFIG else LIQUIDITY_SCENARIOS
+    scenarios = pick_scenarios("liquidity", CONFIG_LIQUIDITY_SCENARIOS if USE_CONFIG else LIQUIDITY_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -460,12 +474,11 @@ def generate_liquidity_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_bos_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_bos_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate Break of Structure exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_BOS_SCENARIOS if USE_CONFIG else BOS_SCENARIOS
+    scenarios = pick_scenarios("bos", CONFIG_BOS_SCENARIOS if USE_CONFIG else BOS_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -506,12 +519,11 @@ def generate_bos_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_choch_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_choch_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate Change of Character exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_CHOCH_SCENARIOS if USE_CONFIG else CHOCH_SCENARIOS
+    scenarios = pick_scenarios("choch", CONFIG_CHOCH_SCENARIOS if USE_CONFIG else CHOCH_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -552,12 +564,11 @@ def generate_choch_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_order_block_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_order_block_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate Order Block identification exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_ORDER_BLOCK_SCENARIOS if USE_CONFIG else ORDER_BLOCK_SCENARIOS
+    scenarios = pick_scenarios("order_block", CONFIG_ORDER_BLOCK_SCENARIOS if USE_CONFIG else ORDER_BLOCK_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -603,12 +614,11 @@ def generate_order_block_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_fvg_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_fvg_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate Fair Value Gap identification exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_FVG_SCENARIOS if USE_CONFIG else FVG_SCENARIOS
+    scenarios = pick_scenarios("fvg", CONFIG_FVG_SCENARIOS if USE_CONFIG else FVG_SCENARIOS, rng)
     
     for i in range(10):
         scenario = scenarios[i % len(scenarios)]
@@ -654,15 +664,14 @@ def generate_fvg_exercises(category_id: str, level: int) -> List[Dict]:
     return exercises
 
 
-def generate_premium_discount_exercises(category_id: str, level: int) -> List[Dict]:
+def generate_premium_discount_exercises(category_id: str, level: int, rng: random.Random) -> List[Dict]:
     """Generate Premium/Discount zone exercises"""
     exercises = []
     
-    # Use config if available
-    scenarios = CONFIG_PREMIUM_DISCOUNT_SCENARIOS if USE_CONFIG else PREMIUM_DISCOUNT_SCENARIOS
+    scenarios = pick_scenarios("premium_discount", CONFIG_PREMIUM_DISCOUNT_SCENARIOS if USE_CONFIG else PREMIUM_DISCOUNT_SCENARIOS, rng)
     
     for i in range(10):
-        scenario = scenarios[0]  # Use the same scenario with different questions
+        scenario = scenarios[i % len(scenarios)]  # Fixtures: the same scenario with different questions
         candles = scenario["candles"]
         
         equilibrium = scenario["equilibrium"]
@@ -715,8 +724,41 @@ def generate_premium_discount_exercises(category_id: str, level: int) -> List[Di
 # MAIN GENERATOR
 # ============================================================
 
-def get_interactive_exercises(category_id: str, level: int) -> List[Dict]:
-    """Get interactive exercises for a category and level"""
+# Bump when a generator changes in a way that alters its output
+GENERATOR_VERSION = 3
+
+
+def _config_version() -> str:
+    """Short hash of the scenario tables and generator version in use"""
+    if PROCEDURAL_SCENARIOS:
+        tables = ["procedural"]
+    elif USE_CONFIG:
+        tables = [CANDLES_OHLC, CONFIG_SWING_SCENARIOS, CONFIG_LIQUIDITY_SCENARIOS, CONFIG_BOS_SCENARIOS,
+                  CONFIG_CHOCH_SCENARIOS, CONFIG_ORDER_BLOCK_SCENARIOS, CONFIG_FVG_SCENARIOS, CONFIG_PREMIUM_DISCOUNT_SCENARIOS]
+    else:
+        tables = [CANDLE_SCENARIOS, SWING_SCENARIOS, LIQUIDITY_SCENARIOS, BOS_SCENARIOS,
+                  CHOCH_SCENARIOS, ORDER_BLOCK_SCENARIOS, FVG_SCENARIOS, PREMIUM_DISCOUNT_SCENARIOS]
+    payload = json.dumps([GENERATOR_VERSION, tables], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+CONFIG_VERSION = _config_version()
+
+
+def default_seed(category_id: str, level: int) -> int:
+    """The seed a level uses unless a refresh picked another one"""
+    return int(hashlib.sha256(f"{category_id}:{level}".encode("utf-8")).hexdigest()[:8], 16)
+
+
+def get_interactive_exercises(category_id: str, level: int, seed: Optional[int] = None) -> List[Dict]:
+    """Get interactive exercises for a category and level.
+
+    Pure function of (category, level, seed, CONFIG_VERSION): the same inputs
+    always produce the same exercises, so answers can be graded by regenerating.
+    """
+    if seed is None:
+        seed = default_seed(category_id, level)
+    rng = random.Random(f"{category_id}:{level}:{seed}:{CONFIG_VERSION}")
     
     # Map categories to generators
     generators = {
@@ -733,84 +775,140 @@ def get_interactive_exercises(category_id: str, level: int) -> List[Dict]:
     }
     
     generator = generators.get(category_id, generate_candlestick_exercises)
-    return generator(category_id, level)
+    exercises = generator(category_id, level, rng)
+    for ex in exercises:
+        ex["seed"] = seed
+        ex["config_version"] = CONFIG_VERSION
+    return exercises
+
+
+def find_interactive_exercise(exercise_id: str, category_id: str, level: int, seed: Optional[int] = None) -> Optional[Dict]:
+    """Regenerate a level and pick one exercise out of it"""
+    return next((ex for ex in get_interactive_exercises(category_id, level, seed) if ex["id"] == exercise_id), None)
+
+
+# ============================================================
+# SCENARIO TABLE - each distinct chart stored once per payload
+# ============================================================
+
+def scenario_id(candles: List[Dict]) -> str:
+    """Content hash of a candle list, so identical charts share one id"""
+    payload = json.dumps(candles, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def pack_scenarios(exercises: List[Dict]) -> Union[Dict, List[Dict]]:
+    """{"scenarios": {id: {"candles": [...]}}, "exercises": [...]}, with each
+    exercise carrying "scenario_id" instead of its own copy of the candles.
+
+    When no chart is shared (procedural scenarios) packing only adds ids, so
+    the plain list is returned unchanged.
+    """
+    scenarios = {}
+    ids_by_object = {}  # generators reuse the same list objects, hash each once
+    packed = []
+    for ex in exercises:
+        candles = ex.get("candles")
+        if candles is None:
+            packed.append(ex)
+            continue
+        sid = ids_by_object.get(id(candles))
+        if sid is None:
+            sid = ids_by_object[id(candles)] = scenario_id(candles)
+            scenarios.setdefault(sid, {"candles": candles})
+        packed.append({**{k: v for k, v in ex.items() if k != "candles"}, "scenario_id": sid})
+    if len(scenarios) == sum(1 for ex in packed if "scenario_id" in ex):
+        return exercises
+    return {"scenarios": scenarios, "exercises": packed}
+
+
+def unpack_scenarios(payload) -> List[Dict]:
+    """Inverse of pack_scenarios; plain exercise lists pass through"""
+    if isinstance(payload, list):
+        return payload
+    scenarios = payload["scenarios"]
+    return [
+        {**{k: v for k, v in ex.items() if k != "scenario_id"}, "candles": scenarios[ex["scenario_id"]]["candles"]}
+        if "scenario_id" in ex else ex
+        for ex in payload["exercises"]
+    ]
 
 
 def validate_click_answer(exercise: Dict, clicked_price: float, clicked_time: Optional[str] = None, zone_high: Optional[float] = None, zone_low: Optional[float] = None) -> Dict:
     """Validate user's click answer or drawn zone"""
-    correct = exercise["correct_answer"]
-    tolerance = exercise.get("tolerance", 1.0)
-    
-    # Handle zone drawing (for FVG exercises)
-    if zone_high is not None and zone_low is not None and "price_high" in correct and "price_low" in correct:
-        # Check zone overlap
-        correct_high = correct["price_high"]
-        correct_low = correct["price_low"]
-        
-        # Calculate overlap percentage
-        overlap_top = min(zone_high, correct_high)
-        overlap_bottom = max(zone_low, correct_low)
-        overlap = max(0, overlap_top - overlap_bottom)
-        
-        correct_zone_size = correct_high - correct_low
-        user_zone_size = zone_high - zone_low
-        
-        # Calculate accuracy based on overlap
-        if overlap > 0:
-            overlap_ratio = overlap / correct_zone_size
-            size_ratio = min(user_zone_size, correct_zone_size) / max(user_zone_size, correct_zone_size)
-            accuracy = (overlap_ratio * 0.7 + size_ratio * 0.3) * 100
-            is_correct = accuracy >= 50  # 50% overlap = correct
-        else:
-            accuracy = 0
-            is_correct = False
-        
-        target_price = (correct_high + correct_low) / 2
-        
-        if is_correct:
-            feedback = f"✅ Great zone! The {correct.get('label', 'FVG')} is ${correct_low:.2f} - ${correct_high:.2f}"
+    return validate_click_answers([exercise], [clicked_price], [zone_high], [zone_low])[0]
+
+
+def _column(values, default=np.nan) -> np.ndarray:
+    return np.array([default if v is None else v for v in values], dtype=float)
+
+
+def validate_click_answers(exercises: List[Dict], clicked_prices: List[float], zone_highs: List[Optional[float]], zone_lows: List[Optional[float]]) -> List[Dict]:
+    """Grade many answers at once.
+
+    Same rules as validate_click_answer, evaluated over arrays:
+    - drawn zone (FVG): 70% overlap with the correct zone + 30% size similarity, correct at >= 50
+    - click on a zone (OB/FVG): inside the zone, or within half its size + tolerance of its middle
+    - click on a price: within `tolerance` percent of it
+    """
+    n = len(exercises)
+    if n == 0:
+        return []
+    corrects = [ex["correct_answer"] for ex in exercises]
+    has_zone = np.array(["price_high" in c and "price_low" in c for c in corrects])
+    high = _column([c.get("price_high") for c in corrects])
+    low = _column([c.get("price_low") for c in corrects])
+    price = _column([c.get("price") for c in corrects])
+    tolerance = _column([ex.get("tolerance", 1.0) for ex in exercises])
+    clicked = _column(clicked_prices)
+    user_high = _column(zone_highs)
+    user_low = _column(zone_lows)
+    drawn = has_zone & ~np.isnan(user_high) & ~np.isnan(user_low)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Drawn zones
+        overlap = np.maximum(0, np.minimum(user_high, high) - np.maximum(user_low, low))
+        zone_size = high - low
+        user_size = user_high - user_low
+        size_ratio = np.minimum(user_size, zone_size) / np.maximum(user_size, zone_size)
+        zone_accuracy = np.where(overlap > 0, (overlap / zone_size * 0.7 + size_ratio * 0.3) * 100, 0.0)
+        zone_correct = (overlap > 0) & (zone_accuracy >= 50)
+
+        # Clicks on a zone
+        middle = (high + low) / 2
+        inside = (low <= clicked) & (clicked <= high)
+        middle_diff = np.abs(clicked - middle)
+        near = middle_diff <= zone_size / 2 + tolerance
+        click_zone_correct = inside | near
+        click_zone_accuracy = np.where(click_zone_correct, 100.0, np.maximum(0, 100 - middle_diff / middle * 100))
+
+        # Clicks on a price
+        target = np.where(np.isnan(price), 0.0, price)
+        diff_percent = np.where(target != 0, np.abs(clicked - target) / target * 100, 0.0)
+        point_correct = diff_percent <= tolerance
+        point_accuracy = np.where(point_correct, np.maximum(0, 100 - diff_percent / tolerance * 100), 0.0)
+
+    is_correct = np.where(drawn, zone_correct, np.where(has_zone, click_zone_correct, point_correct))
+    accuracy = np.where(drawn, zone_accuracy, np.where(has_zone, click_zone_accuracy, point_accuracy))
+    correct_price = np.where(drawn, middle, np.where(has_zone & np.isnan(price), middle, target))
+
+    results = []
+    for i, (exercise, correct) in enumerate(zip(exercises, corrects)):
+        ok = bool(is_correct[i])
+        label = correct.get("label", "FVG" if drawn[i] else "answer")
+        if drawn[i]:
+            zone = f"${low[i]:.2f} - ${high[i]:.2f}"
+            feedback = f"✅ Great zone! The {label} is {zone}" if ok else \
+                f"❌ Not quite. The {label} is {zone}. You drew ${user_low[i]:.2f} - ${user_high[i]:.2f}"
         else:
-            feedback = f"❌ Not quite. The {correct.get('label', 'FVG')} is ${correct_low:.2f} - ${correct_high:.2f}. You drew ${zone_low:.2f} - ${zone_high:.2f}"
-        
-        return {
-            "is_correct": is_correct,
+            feedback = f"✅ Correct! The {label} is ${correct_price[i]:.2f}" if ok else \
+                f"❌ Not quite. The {label} is ${correct_price[i]:.2f}. You clicked ${clicked[i]:.2f}"
+        results.append({
+            "is_correct": ok,
             "feedback": feedback,
-            "correct_price": target_price,
-            "clicked_price": clicked_price,
-            "accuracy": round(accuracy, 1),
+            "correct_price": float(correct_price[i]),
+            "clicked_price": clicked_prices[i],
+            "accuracy": round(float(accuracy[i]), 1),
             "explanation": exercise.get("explanation", "")
-        }
-    
-    # Get target price (handle zones with high/low for click mode)
-    if "price_high" in correct and "price_low" in correct:
-        # For zones (OB, FVG), check if click is within the zone
-        if correct["price_low"] <= clicked_price <= correct["price_high"]:
-            is_correct = True
-            accuracy = 100.0
-        else:
-            # Calculate distance from zone
-            target_price = (correct["price_high"] + correct["price_low"]) / 2
-            price_diff = abs(clicked_price - target_price)
-            zone_size = correct["price_high"] - correct["price_low"]
-            is_correct = price_diff <= (zone_size / 2 + tolerance)
-            accuracy = max(0, 100 - (price_diff / target_price * 100)) if not is_correct else 100.0
-    else:
-        target_price = correct.get("price", 0)
-        price_diff = abs(clicked_price - target_price)
-        price_diff_percent = (price_diff / target_price) * 100 if target_price else 0
-        is_correct = price_diff_percent <= tolerance
-        accuracy = max(0, 100 - (price_diff_percent / tolerance * 100)) if is_correct else 0
-    
-    if is_correct:
-        feedback = f"✅ Correct! The {correct.get('label', 'answer')} is ${correct.get('price', target_price):.2f}"
-    else:
-        feedback = f"❌ Not quite. The {correct.get('label', 'answer')} is ${correct.get('price', target_price):.2f}. You clicked ${clicked_price:.2f}"
-    
-    return {
-        "is_correct": is_correct,
-        "feedback": feedback,
-        "correct_price": correct.get("price", target_price),
-        "clicked_price": clicked_price,
-        "accuracy": round(accuracy, 1),
-        "explanation": exercise.get("explanation", "")
-    }
+        })
+    return results
@@ -0,0 +1,63 @@
+"""
+Incremental JSON Array Parser
+Parses a JSON array of objects as it arrives in chunks, returning each
+top-level object as soon as its closing brace is seen. Text before the
+opening bracket (such as a ```json fence) is ignored.
+"""
+import json
+from typing import Dict, List
+
+
+class JSONArrayStreamParser:
+    """Feed chunks of '[{...}, {...}]'; get back the objects completed so far"""
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0          # nesting depth inside the top-level array
+        self._in_string = False
+        self._escaped = False
+        self._current: List[str] = []
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Dict]:
+        completed = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+
+            if self._depth > 0:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._current = [char]
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the top-level array
+                    self._finished = True
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(json.loads("".join(self._current)))
+                    self._current = []
+        return completed
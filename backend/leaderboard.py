@@ -0,0 +1,210 @@
+"""
+XP Leaderboards
+Global, weekly and per-category XP rankings kept in memory as sorted lists of
+(-xp, user_id), so top-N reads and a user's rank are O(log n) and every XP
+award updates its boards in place. The boards are loaded from the database
+once at startup and never rescanned; load() retries with backoff until that
+succeeds, and `loaded` stays False (the routes answer 503) until then.
+
+- global: users.xp
+- weekly: users.weekly_xp, counted for the ISO week in users.weekly_xp_week
+- category: sum of user_progress.xp_earned per category
+
+Ties share a rank. Admin accounts are left off the boards.
+
+Every worker keeps its own boards. An award sets the user's stored xp and
+weekly_xp totals, so the global and weekly boards catch up with other
+workers' awards to a user on that user's next award here. Category boards
+only add this worker's awards, so they drift apart between workers until
+a restart rebuilds them.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = "global"
+WEEKLY = "weekly"
+PAGE_SIZE = 1000
+
+
+def current_week(now: Optional[datetime] = None) -> str:
+    year, week, _ = (now or datetime.now(timezone.utc)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def weekly_xp_fields(user: dict, xp_gained: int) -> dict:
+    """users columns to write with an XP award; the weekly total restarts each ISO week"""
+    week = current_week()
+    weekly_xp = (user.get('weekly_xp') or 0) if user.get('weekly_xp_week') == week else 0
+    return {'weekly_xp': weekly_xp + xp_gained, 'weekly_xp_week': week}
+
+
+class Leaderboard:
+    """One ranking: user_id -> xp, ordered by xp descending"""
+
+    def __init__(self):
+        self._scores: Dict[str, int] = {}
+        self._ranked = SortedList()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def set(self, user_id: str, xp: int):
+        self.remove(user_id)
+        self._scores[user_id] = xp
+        self._ranked.add((-xp, user_id))
+
+    def add(self, user_id: str, xp: int):
+        self.set(user_id, self._scores.get(user_id, 0) + xp)
+
+    def remove(self, user_id: str):
+        xp = self._scores.pop(user_id, None)
+        if xp is not None:
+            self._ranked.remove((-xp, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based rank, shared by equal scores"""
+        xp = self._scores.get(user_id)
+        if xp is None:
+            return None
+        return self._ranked.bisect_left((-xp,)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, str, int]]:
+        """(rank, user_id, xp) for the first `limit` entries"""
+        entries = []
+        rank, previous = 0, None
+        for position, (negative_xp, user_id) in enumerate(self._ranked.islice(0, limit), start=1):
+            if negative_xp != previous:
+                rank, previous = position, negative_xp
+            entries.append((rank, user_id, -negative_xp))
+        return entries
+
+
+def _pages(client, table: str, columns: str) -> Iterator[dict]:
+    start = 0
+    while True:
+        rows = client.table(table).select(columns).order('id').range(start, start + PAGE_SIZE - 1).execute().data or []
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        start += PAGE_SIZE
+
+
+class Leaderboards:
+    """Every board plus the usernames to show on them"""
+
+    def __init__(self):
+        self.global_board = Leaderboard()
+        self.weekly_board = Leaderboard()
+        self.week = current_week()
+        self.categories: Dict[str, Leaderboard] = {}
+        self.usernames: Dict[str, str] = {}
+        self.loaded = False
+
+    def rebuild(self, client):
+        """Load every board from users and user_progress (startup only)"""
+        global_board, weekly_board, categories, usernames = Leaderboard(), Leaderboard(), {}, {}
+        week = current_week()
+        admins = set()
+        for user in _pages(client, 'users', 'id,username,xp,is_admin,weekly_xp,weekly_xp_week'):
+            if user.get('is_admin'):
+                admins.add(user['id'])
+                continue
+            usernames[user['id']] = user.get('username')
+            global_board.set(user['id'], user.get('xp') or 0)
+            if user.get('weekly_xp_week') == week and user.get('weekly_xp'):
+                weekly_board.set(user['id'], user['weekly_xp'])
+        for row in _pages(client, 'user_progress', 'id,user_id,category_id,xp_earned'):
+            if row['user_id'] in admins or not row.get('xp_earned'):
+                continue
+            categories.setdefault(row['category_id'], Leaderboard()).add(row['user_id'], row['xp_earned'])
+
+        self.global_board, self.weekly_board, self.week = global_board, weekly_board, week
+        self.categories, self.usernames = categories, usernames
+        self.loaded = True
+        logger.info(f"Leaderboards loaded: {len(global_board)} users, {len(categories)} categories")
+
+    async def load(self, client, max_delay: float = 60.0):
+        """rebuild() in a worker thread, retried with exponential backoff until it succeeds"""
+        delay = 1.0
+        while True:
+            try:
+                await asyncio.to_thread(self.rebuild, client)
+                return
+            except Exception as e:
+                logger.error(f"Error loading leaderboards, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+    def _roll_week(self):
+        week = current_week()
+        if week != self.week:
+            self.weekly_board, self.week = Leaderboard(), week
+
+    def board(self, name: str) -> Leaderboard:
+        if name == GLOBAL:
+            return self.global_board
+        if name == WEEKLY:
+            self._roll_week()
+            return self.weekly_board
+        return self.categories.get(name) or Leaderboard()
+
+    def add_user(self, user: dict):
+        if not user.get('is_admin'):
+            self.usernames[user['id']] = user.get('username')
+            self.global_board.set(user['id'], user.get('xp') or 0)
+
+    def remove_user(self, user_id: str):
+        self.usernames.pop(user_id, None)
+        self.global_board.remove(user_id)
+        self.weekly_board.remove(user_id)
+        for board in self.categories.values():
+            board.remove(user_id)
+
+    def award(self, user: dict, total_xp: int, weekly_xp: int, category_xp: Optional[Dict[str, int]] = None):
+        """Apply an XP award already written to the database: the user's new users.xp and
+        users.weekly_xp, plus the XP gained per category"""
+        if user.get('is_admin'):
+            return
+        self._roll_week()
+        user_id = user['id']
+        self.usernames.setdefault(user_id, user.get('username'))
+        self.global_board.set(user_id, total_xp)
+        if weekly_xp:
+            self.weekly_board.set(user_id, weekly_xp)
+        else:
+            self.weekly_board.remove(user_id)
+        for category_id, xp_gained in (category_xp or {}).items():
+            if xp_gained:
+                self.categories.setdefault(category_id, Leaderboard()).add(user_id, xp_gained)
+
+    def top(self, name: str, limit: int) -> dict:
+        board = self.board(name)
+        return {
+            "board": name,
+            "week": self.week if name == WEEKLY else None,
+            "total": len(board),
+            "entries": [
+                {"rank": rank, "user_id": user_id, "username": self.usernames.get(user_id), "xp": xp}
+                for rank, user_id, xp in board.top(limit)
+            ],
+        }
+
+    def standing(self, name: str, user_id: str) -> dict:
+        board = self.board(name)
+        return {
+            "board": name,
+            "week": self.week if name == WEEKLY else None,
+            "total": len(board),
+            "user_id": user_id,
+            "rank": board.rank(user_id),
+            "xp": board.score(user_id) or 0,
+        }
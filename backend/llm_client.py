@@ -0,0 +1,189 @@
+"""
+LLM Client for curriculum generation
+Wraps the chat provider with an on-disk response cache keyed by a hash of the
+prompt, system message and model, so unchanged prompts are never paid for twice.
+
+Environment:
+- LLM_PROVIDER: "emergent" (default) or "stub", a deterministic offline provider
+- LLM_CACHE_DIR: where raw responses are stored (default backend/.llm_cache)
+- LLM_CACHE: set to "off" to bypass the cache
+"""
+import os
+import json
+import random
+import asyncio
+import hashlib
+import re
+import uuid
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_EMERGENT = "emergent"
+PROVIDER_STUB = "stub"
+
+MODEL_VENDOR = "openai"
+MODEL_NAME = "gpt-4.1-mini"
+STUB_MODEL_NAME = "stub-v1"
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".llm_cache"
+
+STREAM_CHUNK_SIZE = 256
+
+
+def get_provider() -> str:
+    return os.environ.get("LLM_PROVIDER", PROVIDER_EMERGENT).lower()
+
+
+def is_available() -> bool:
+    """Whether a response can be produced at all (stub needs no API key)"""
+    return get_provider() == PROVIDER_STUB or bool(os.environ.get("EMERGENT_LLM_KEY"))
+
+
+def streams_live() -> bool:
+    """Whether stream() yields a fresh response in several chunks; the emergent client answers in one"""
+    return get_provider() == PROVIDER_STUB
+
+
+def model_id() -> str:
+    if get_provider() == PROVIDER_STUB:
+        return f"{PROVIDER_STUB}/{STUB_MODEL_NAME}"
+    return f"{MODEL_VENDOR}/{MODEL_NAME}"
+
+
+def cache_key(prompt: str, system_message: str, model: str) -> str:
+    payload = json.dumps([model, system_message, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_dir() -> Optional[Path]:
+    if os.environ.get("LLM_CACHE", "on").lower() == "off":
+        return None
+    return Path(os.environ.get("LLM_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def read_cached(key: str) -> Optional[str]:
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None
+    path = cache_dir / key[:2] / f"{key}.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["response"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cached(key: str, model: str, response: str):
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return
+    path = cache_dir / key[:2] / f"{key}.json"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent readers never see half a file
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        tmp_path.write_text(json.dumps({"model": model, "response": response}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write LLM cache entry {key}: {e}")
+
+
+def discard(prompt: str, system_message: str):
+    """Drop a cached response, e.g. one that turned out not to parse"""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return
+    key = cache_key(prompt, system_message, model_id())
+    try:
+        (cache_dir / key[:2] / f"{key}.json").unlink()
+    except OSError:
+        pass
+
+
+def stub_response(prompt: str) -> str:
+    """Deterministic exercise array in the shape the curriculum prompt asks for"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    category = re.search(r"CATEGORY: (.+)", prompt)
+    level = re.search(r"LEVEL: (\d+)", prompt)
+    category_name = category.group(1).strip() if category else "Trading"
+    level_num = int(level.group(1)) if level else 1
+
+    exercises = []
+    for i in range(1, 11):
+        if rng.random() < 0.3:
+            answer_type, options = "true_false", ["True", "False"]
+        else:
+            answer_type, options = "multiple_choice", [f"{category_name} option {c}" for c in "ABCD"]
+        correct = rng.randrange(len(options))
+        exercises.append({
+            "exercise_number": i,
+            "title": f"{category_name} {level_num}.{i}",
+            "explanation": f"Stub explanation for {category_name} level {level_num}, exercise {i}.",
+            "image_description": f"Chart illustrating {category_name.lower()} concept {i}",
+            "question": f"Stub question {i} about {category_name}?",
+            "answer_type": answer_type,
+            "options": options,
+            "correct_answer": correct,
+            "feedback_correct": "Correct!",
+            "feedback_wrong": f"The answer was: {options[correct]}",
+        })
+    return json.dumps(exercises, indent=2)
+
+
+async def _send_to_provider(prompt: str, system_message: str, session_hint: str) -> str:
+    if get_provider() == PROVIDER_STUB:
+        return stub_response(prompt)
+
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+    chat = LlmChat(
+        api_key=os.environ.get("EMERGENT_LLM_KEY"),
+        session_id=f"{session_hint}-{uuid.uuid4().hex[:8]}",
+        system_message=system_message
+    ).with_model(MODEL_VENDOR, MODEL_NAME)
+    return await chat.send_message(UserMessage(text=prompt))
+
+
+async def complete(prompt: str, system_message: str, session_hint: str = "curriculum") -> str:
+    """Return the raw LLM response for prompt, from the disk cache when possible"""
+    model = model_id()
+    key = cache_key(prompt, system_message, model)
+    cached = read_cached(key)
+    if cached is not None:
+        return cached
+
+    response = await _send_to_provider(prompt, system_message, session_hint)
+    write_cached(key, model, response)
+    return response
+
+
+async def _chunked(text: str) -> AsyncIterator[str]:
+    for start in range(0, len(text), STREAM_CHUNK_SIZE):
+        yield text[start:start + STREAM_CHUNK_SIZE]
+        await asyncio.sleep(0)
+
+
+async def stream(prompt: str, system_message: str, session_hint: str = "curriculum") -> AsyncIterator[str]:
+    """Yield the raw LLM response in chunks, caching the full text once it is complete.
+
+    The emergent LlmChat client only exposes send_message, so a live response
+    arrives as one chunk; cached and stub responses are replayed in chunks.
+    """
+    model = model_id()
+    key = cache_key(prompt, system_message, model)
+    cached = read_cached(key)
+    if cached is not None:
+        async for chunk in _chunked(cached):
+            yield chunk
+        return
+
+    if get_provider() == PROVIDER_STUB:
+        response = stub_response(prompt)
+        async for chunk in _chunked(response):
+            yield chunk
+    else:
+        response = await _send_to_provider(prompt, system_message, session_hint)
+        yield response
+    write_cached(key, model, response)
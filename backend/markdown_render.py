@@ -0,0 +1,32 @@
+"""
+Markdown Rendering
+Renders lesson and intro markdown to sanitized HTML on the server, so clients
+can display it without shipping or running a markdown parser.
+"""
+import textwrap
+from functools import lru_cache
+
+from markdown_it import MarkdownIt
+
+# Raw HTML in the source is escaped, never passed through; markdown-it also
+# refuses javascript:/vbscript:/data: link targets by default
+_md = MarkdownIt("commonmark", {"html": False, "linkify": False, "typographer": False}).enable("table")
+
+
+def _normalize(text: str) -> str:
+    """Undo triple-quote indentation and turn the content's • bullets into markdown lists"""
+    lines = []
+    for line in textwrap.dedent(text).strip().splitlines():
+        stripped = line.lstrip()
+        if stripped.startswith("• "):
+            line = "- " + stripped[2:]
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=1024)
+def render_markdown(text: str) -> str:
+    """Markdown string -> sanitized HTML (cached per distinct text)"""
+    if not text:
+        return ""
+    return _md.render(_normalize(text))
@@ -3,7 +3,7 @@ SQLAlchemy Models for TradeLingo
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Float, ForeignKey, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -22,6 +22,9 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     xp = Column(Integer, default=0)
     level = Column(Integer, default=1)
+    weekly_xp = Column(Integer, default=0)
+    weekly_xp_week = Column(String(10), nullable=True)  # ISO week of weekly_xp, e.g. 2026-W07
+    progress_version = Column(String(32), nullable=True)  # replaced on every progress write, see ProgressCache
     completed_lessons = Column(JSON, default=list)
     subscription = Column(String(20), default='free')  # free, standard, pro
     
@@ -82,6 +85,7 @@ class JournalEntry(Base):
 
 class UserProgress(Base):
     __tablename__ = 'user_progress'
+    __table_args__ = (Index('ix_user_progress_user_category_level', 'user_id', 'category_id', 'level'),)
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -97,6 +101,33 @@ class UserProgress(Base):
     # Relationships
     user = relationship('User', back_populates='progress')
 
+class ReviewItem(Base):
+    __tablename__ = 'review_items'
+    __table_args__ = (UniqueConstraint('user_id', 'item_id'),)
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    item_id = Column(String(100), nullable=False)  # exercise ID
+    
+    # SM-2 state
+    ease = Column(Float, default=2.5)
+    interval_days = Column(Integer, default=0)
+    repetitions = Column(Integer, default=0)
+    due_day = Column(Integer, nullable=False)  # days since 1970-01-01 (UTC)
+    history = Column(String(32), default='')  # last answer qualities, one digit each
+    
+    reviewed_at = Column(DateTime(timezone=True), default=utc_now)
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    key = Column(String(255), unique=True, nullable=False, index=True)  # Idempotency-Key header
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the route and body
+    response = Column(JSON, nullable=True)  # null while the first attempt runs
+    created_at = Column(DateTime(timezone=True), default=utc_now, index=True)  # expired rows are purged by created_at
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
 class InteractiveExerciseCache(Base):
     __tablename__ = 'interactive_exercise_cache'
     
@@ -0,0 +1,109 @@
+"""
+Password Hashing
+bcrypt burns 100-300ms of CPU per call by design. Hashing and verification
+run on a dedicated, bounded thread pool so the event loop keeps serving
+other requests during a burst of logins; bcrypt releases the GIL while it
+works.
+
+At most max_pending calls are queued or running; beyond that callers get a
+503 with Retry-After instead of an ever-growing queue. stats() reports the
+queue depth and wait/run times.
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt"""
+    salt = bcrypt.gensalt()
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verify a password against its hash"""
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+class PasswordHasher:
+    """bcrypt on its own thread pool, with a cap on queued work"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending: Optional[int] = None):
+        self.workers = workers
+        self.max_pending = max_pending or workers * 16
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()  # counters are updated from the worker threads
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self.queued + self.running >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many sign-in requests, please retry", headers={"Retry-After": "1"})
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        submitted = time.perf_counter()
+
+        def work():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds_total += started - submitted
+                self.wait_seconds_max = max(self.wait_seconds_max, started - submitted)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.run_seconds_total += time.perf_counter() - started
+
+        future = self._executor.submit(work)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancelled():  # dropped before a worker picked it up
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit(verify_password, password, password_hash)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_ms": {
+                "avg": round(self.wait_seconds_total / self.completed * 1000, 3) if self.completed else 0.0,
+                "max": round(self.wait_seconds_max * 1000, 3),
+            },
+            "run_ms_avg": round(self.run_seconds_total / self.completed * 1000, 3) if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,113 @@
+"""
+Progress Summary
+Unlock state, completion and XP for every category and level of one user,
+built from a single query: the user's admin flag with their user_progress
+rows embedded (PostgREST follows the user_progress.user_id foreign key).
+
+Summaries are cached per user together with users.progress_version, which
+every progress write replaces with a fresh value. A read fetches only that
+column and reuses the cached summary while it matches, so a write made by
+any worker is seen on the next read.
+"""
+import uuid
+from typing import Dict, List, Mapping
+
+from cachetools import TTLCache
+
+LEVELS_PER_CATEGORY = 10
+EXERCISES_PER_LEVEL = 10
+
+
+def xp_per_exercise(level: int) -> int:
+    return 5 + (level * 2)
+
+
+def build_levels(category_id: str, completed_by_level: Mapping[int, int], admin_mode: bool = False) -> List[dict]:
+    """Level cards for one category; a level unlocks once the previous one is complete"""
+    levels = []
+    for level_num in range(1, LEVELS_PER_CATEGORY + 1):
+        completed_exercises = completed_by_level.get(level_num, 0)
+
+        # Admin users get everything unlocked for testing
+        if admin_mode:
+            is_unlocked = True
+        else:
+            is_unlocked = level_num == 1 or completed_by_level.get(level_num - 1, 0) >= EXERCISES_PER_LEVEL
+
+        levels.append({
+            "level": level_num,
+            "category_id": category_id,
+            "total_exercises": EXERCISES_PER_LEVEL,
+            "completed_exercises": completed_exercises,
+            "is_completed": completed_exercises >= EXERCISES_PER_LEVEL,
+            "is_unlocked": is_unlocked,
+            "xp_per_exercise": xp_per_exercise(level_num)
+        })
+    return levels
+
+
+def build_summary(user_id: str, admin_mode: bool, progress_rows: List[dict], category_ids: List[str]) -> dict:
+    """Summary over `category_ids` plus any other category the user has progress in"""
+    completed: Dict[str, Dict[int, int]] = {}
+    xp_earned: Dict[str, int] = {}
+    for row in progress_rows:
+        category_id = row['category_id']
+        level = row.get('level') or 1
+        completed.setdefault(category_id, {})[level] = row.get('exercises_completed') or 0
+        xp_earned[category_id] = xp_earned.get(category_id, 0) + (row.get('xp_earned') or 0)
+
+    categories = {}
+    for category_id in list(category_ids) + [c for c in completed if c not in category_ids]:
+        by_level = completed.get(category_id, {})
+        total_completed = sum(by_level.values())
+        categories[category_id] = {
+            "category_id": category_id,
+            "levels": build_levels(category_id, by_level, admin_mode),
+            "total_completed": total_completed,
+            "total_exercises": LEVELS_PER_CATEGORY * EXERCISES_PER_LEVEL,
+            "xp_earned": xp_earned.get(category_id, 0),
+        }
+
+    return {
+        "user_id": user_id,
+        "is_admin": admin_mode,
+        "categories": categories,
+        "total_completed": sum(c["total_completed"] for c in categories.values()),
+        "xp_earned": sum(xp_earned.values()),
+    }
+
+
+class ProgressCache:
+    """Per-user progress summaries, checked against users.progress_version on every read"""
+
+    def __init__(self, client, category_ids: List[str], maxsize: int = 10000, ttl: float = 300):
+        self.client = client
+        self.category_ids = list(category_ids)
+        self._summaries = TTLCache(maxsize=maxsize, ttl=ttl)  # user_id -> (progress_version, summary)
+
+    def get(self, user_id: str):
+        """The user's summary, or None for an unknown user"""
+        result = self.client.table('users').select('progress_version').eq('id', user_id).execute()
+        if not result.data:
+            self._summaries.pop(user_id, None)
+            return None
+        version = result.data[0].get('progress_version')
+        cached = self._summaries.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Read after the version: a write landing in between only makes the next read refetch
+        result = self.client.table('users').select(
+            'is_admin,user_progress(category_id,level,exercises_completed,xp_earned)'
+        ).eq('id', user_id).execute()
+        if not result.data:
+            return None
+        user = result.data[0]
+        summary = build_summary(user_id, user.get('is_admin') or False, user.get('user_progress') or [], self.category_ids)
+        self._summaries[user_id] = (version, summary)
+        return summary
+
+    def invalidate(self, user_id: str):
+        """Call after writing the user's progress: every worker's cached summary goes stale"""
+        self._summaries.pop(user_id, None)
+        self.client.table('users').update({'progress_version': uuid.uuid4().hex}).eq('id', user_id).execute()
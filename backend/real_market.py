@@ -70,6 +70,7 @@ class ReplaySession(BaseModel):
     active_trade: Optional[TradeEntry] = None
     trades_completed: int = 0
     rule_violations: int = 0
+    seq: int = 0  # Bumped on every accepted command, used to reject stale ones
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class DisciplineScore(BaseModel):
@@ -161,6 +162,18 @@ AVAILABLE_ASSETS = [
     {"id": "AAPL", "name": "Apple Inc.", "type": "stock"},
 ]
 
+# Starting price used when generating candles for each asset
+ASSET_BASE_PRICES = {
+    "EURUSD": 1.08,
+    "GBPUSD": 1.26,
+    "BTCUSD": 42000,
+    "SPX500": 4800,
+    "GOLD": 2000,
+    "AAPL": 180
+}
+
+VALID_TIMEFRAMES = ["1m", "5m", "15m"]
+
 # ==================== RULE VALIDATION ====================
 
 def validate_entry(trade: TradeEntry, orb: ORBRange) -> List[str]:
@@ -0,0 +1,218 @@
+"""
+Spaced Repetition
+SM-2 review scheduling over exercise IDs. Every graded answer updates the
+exercise's ease, interval and due day; /review/next hands out the exercises
+that are due.
+
+Each user's schedule lives in memory as a sorted map of due day -> exercises
+due that day, so the next batch is read from the front of the map in
+O(log days + batch), however many exercises the user has seen. Schedules are
+loaded from the review_items table on first use and cached for at most
+SCHEDULE_TTL seconds, which bounds how stale another worker's answers can
+leave /review/next. The table stays the source of truth, one compact row per
+(user, exercise): SM-2 state plus the last qualities as a string of digits.
+record() re-reads the rows it is about to update, so it always steps SM-2
+from the latest stored state rather than this worker's copy.
+"""
+import re
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cachetools import TTLCache
+from sortedcontainers import SortedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+HISTORY_LENGTH = 32
+SCHEDULE_TTL = 60
+REVIEW_COLUMNS = 'item_id,ease,interval_days,repetitions,due_day,history'
+EPOCH = date(1970, 1, 1)
+
+_EXERCISE_ID_RE = re.compile(r'^(.+)-L(\d+)-E(\d+)$')
+
+
+def today() -> int:
+    """Days since the epoch (UTC)"""
+    return (datetime.now(timezone.utc).date() - EPOCH).days
+
+
+def day_to_date(day: int) -> str:
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def answer_quality(is_correct: bool, accuracy: Optional[float] = None) -> int:
+    """SM-2 quality (0-5) for a graded answer"""
+    if is_correct:
+        return 5 if accuracy is not None and accuracy >= 90 else 4
+    return 2 if accuracy else 1
+
+
+@dataclass
+class ReviewState:
+    item_id: str
+    ease: float = DEFAULT_EASE
+    interval: int = 0
+    reps: int = 0
+    due_day: int = 0
+    history: str = ""
+
+    def review(self, quality: int, day: int):
+        """Apply one SM-2 step"""
+        if quality < 3:
+            self.reps = 0
+            self.interval = 1
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = 1
+            elif self.reps == 2:
+                self.interval = 6
+            else:
+                self.interval = max(1, round(self.interval * self.ease))
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due_day = day + self.interval
+        self.history = (self.history + str(quality))[-HISTORY_LENGTH:]
+
+    def to_dict(self) -> dict:
+        match = _EXERCISE_ID_RE.match(self.item_id)
+        return {
+            "exercise_id": self.item_id,
+            "category_id": match.group(1) if match else None,
+            "level": int(match.group(2)) if match else None,
+            "due_date": day_to_date(self.due_day),
+            "interval_days": self.interval,
+            "ease": round(self.ease, 2),
+            "repetitions": self.reps,
+            "history": self.history,
+        }
+
+
+class UserSchedule:
+    """One user's review states, bucketed by due day"""
+
+    def __init__(self):
+        self.items: Dict[str, ReviewState] = {}
+        self._due = SortedDict()  # due day -> {item_id: None}, insertion ordered
+
+    def __len__(self):
+        return len(self.items)
+
+    def _unschedule(self, state: ReviewState):
+        bucket = self._due.get(state.due_day)
+        if bucket is not None:
+            bucket.pop(state.item_id, None)
+            if not bucket:
+                del self._due[state.due_day]
+
+    def schedule(self, state: ReviewState):
+        old = self.items.get(state.item_id)
+        if old is not None:
+            self._unschedule(old)
+        self.items[state.item_id] = state
+        self._due.setdefault(state.due_day, {})[state.item_id] = None
+
+    def review(self, item_id: str, quality: int, day: int) -> ReviewState:
+        state = self.items.get(item_id)
+        if state is None:
+            state = ReviewState(item_id=item_id)
+        else:
+            self._unschedule(state)
+        state.review(quality, day)
+        self.schedule(state)
+        return state
+
+    def next_due(self, day: int, limit: int) -> List[ReviewState]:
+        """Up to `limit` items due on or before `day`, most overdue first"""
+        batch = []
+        for due_day in self._due.irange(maximum=day):
+            for item_id in self._due[due_day]:
+                batch.append(self.items[item_id])
+                if len(batch) >= limit:
+                    return batch
+        return batch
+
+    def next_due_day(self) -> Optional[int]:
+        return self._due.peekitem(0)[0] if self._due else None
+
+
+class ReviewScheduler:
+    """Per-user schedules backed by the review_items table"""
+
+    def __init__(self, client, max_users: int = 10000, ttl: float = SCHEDULE_TTL):
+        self.client = client
+        self._schedules: TTLCache = TTLCache(maxsize=max_users, ttl=ttl)
+
+    @staticmethod
+    def _state(row: dict) -> ReviewState:
+        return ReviewState(
+            item_id=row['item_id'],
+            ease=row.get('ease') or DEFAULT_EASE,
+            interval=row.get('interval_days') or 0,
+            reps=row.get('repetitions') or 0,
+            due_day=row.get('due_day') or 0,
+            history=row.get('history') or "",
+        )
+
+    def schedule_for(self, user_id: str) -> UserSchedule:
+        schedule = self._schedules.get(user_id)
+        if schedule is None:
+            schedule = UserSchedule()
+            rows = self.client.table('review_items').select(REVIEW_COLUMNS).eq('user_id', user_id).execute().data or []
+            for row in rows:
+                schedule.schedule(self._state(row))
+            self._schedules[user_id] = schedule
+        return schedule
+
+    def _refresh(self, schedule: UserSchedule, user_id: str, item_ids: List[str]):
+        """Replace the cached states of item_ids with what is stored now"""
+        rows = self.client.table('review_items').select(REVIEW_COLUMNS).eq('user_id', user_id).in_('item_id', item_ids).execute().data or []
+        stored = {row['item_id']: self._state(row) for row in rows}
+        for item_id in item_ids:
+            schedule.schedule(stored.get(item_id) or ReviewState(item_id=item_id))
+
+    def record(self, user_id: str, reviews: Iterable[Tuple[str, int]]) -> List[ReviewState]:
+        """Apply (item_id, quality) reviews in order and persist them in one upsert"""
+        reviews = list(reviews)
+        if not reviews:
+            return []
+        schedule = self.schedule_for(user_id)
+        self._refresh(schedule, user_id, list(dict.fromkeys(item_id for item_id, _ in reviews)))
+        day = today()
+        states = {}
+        for item_id, quality in reviews:
+            states[item_id] = schedule.review(item_id, quality, day)
+        reviewed_at = datetime.now(timezone.utc).isoformat()
+        self.client.table('review_items').upsert([{
+            'user_id': user_id,
+            'item_id': state.item_id,
+            'ease': round(state.ease, 3),
+            'interval_days': state.interval,
+            'repetitions': state.reps,
+            'due_day': state.due_day,
+            'history': state.history,
+            'reviewed_at': reviewed_at,
+        } for state in states.values()], on_conflict='user_id,item_id').execute()
+        return list(states.values())
+
+    def record_safely(self, user_id: str, reviews: Iterable[Tuple[str, int]]) -> List[ReviewState]:
+        """record() for answer routes: a scheduling failure never fails the answer"""
+        try:
+            return self.record(user_id, reviews)
+        except Exception as e:
+            logger.warning(f"Could not schedule reviews for {user_id}: {e}")
+            return []
+
+    def next_batch(self, user_id: str, limit: int = 10) -> dict:
+        schedule = self.schedule_for(user_id)
+        day = today()
+        due = schedule.next_due(day, limit)
+        next_day = schedule.next_due_day()
+        return {
+            "items": [state.to_dict() for state in due],
+            "tracked": len(schedule),
+            "next_due_date": day_to_date(next_day) if next_day is not None else None,
+        }
@@ -0,0 +1,300 @@
+"""
+Procedural Chart Scenarios
+Synthesizes candle sequences containing a requested SMC pattern (swing points,
+liquidity, BOS, CHoCH, order blocks, FVGs, premium/discount ranges) with known
+answer coordinates.
+
+Candidates are built in NumPy batches from a move template plus noise, then
+checked with the structure detection in smc_detection.py; only candidates
+whose detected structure matches the answer keys are kept. Scenarios have the
+same shape as the hand-written ones in interactive_config.py, so the exercise
+generators use either source unchanged.
+"""
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from smc_detection import detect_structure, fair_value_gaps, order_blocks, swing_highs, swing_lows
+
+BATCH_SIZE = 64
+MAX_BATCHES = 50
+
+START_DATE = date(2024, 1, 1)
+
+
+class Candles(NamedTuple):
+    """A batch of candidates, each array shaped (batch, candles)"""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+def synthesize(template: List[float], batch: int, np_rng: np.random.Generator):
+    """Candidates following `template`: close-to-close moves in steps of ~1% of price.
+
+    Returns (candles, step, pivot); step and pivot are (batch, 1) arrays.
+    """
+    n = len(template)
+    pivot = np.round(np_rng.uniform(80, 250, (batch, 1)), 2)
+    step = pivot * np_rng.uniform(0.006, 0.012, (batch, 1))
+    moves = np.asarray(template, dtype=float) * np_rng.uniform(0.65, 1.35, (batch, n)) * step
+    close = pivot + np.cumsum(moves, axis=1)
+    open_ = np.concatenate([pivot, close[:, :-1]], axis=1)
+    high = np.maximum(open_, close) + step * np_rng.uniform(0.05, 0.6, (batch, n))
+    low = np.minimum(open_, close) - step * np_rng.uniform(0.05, 0.6, (batch, n))
+    candles = Candles(np.round(open_, 2), np.round(high, 2), np.round(low, 2), np.round(close, 2))
+    return candles, step, pivot
+
+
+def well_formed(c: Candles) -> np.ndarray:
+    """Rows where every candle's wicks enclose its body"""
+    return ((c.high >= np.maximum(c.open, c.close)) & (c.low <= np.minimum(c.open, c.close))).all(axis=1)
+
+
+# ==================== PATTERNS ====================
+# Each pattern is described in its bullish orientation; bearish scenarios are
+# the mirror image around the starting price.
+
+class Pattern(NamedTuple):
+    template: List[float]
+    check: Callable  # (candles, step) -> bool mask over the batch
+    keys: Callable   # (candles, row) -> answer keys
+    prices: tuple = ()  # answer keys holding prices, mirrored for bearish scenarios
+    swaps: tuple = ()   # key pairs that trade places when mirrored
+    direction_key: Optional[tuple] = None  # (key, bullish value, bearish value)
+    describe: Optional[Callable] = None  # (keys, bullish) -> (name, description)
+    prepare: Optional[Callable] = None  # (candles, step, np_rng) -> candles, before checks
+    confirm: Optional[Callable] = None  # (candles, row, keys) -> bool, per accepted row
+
+
+def _body(c: Candles) -> np.ndarray:
+    return np.abs(c.close - c.open)
+
+
+def _candle_check(c: Candles, step):
+    return _body(c)[:, 0] >= 0.4 * step[:, 0]
+
+
+def _swing_check(c: Candles, step):
+    highs, lows = swing_highs(c.high), swing_lows(c.low)
+    return highs[:, 2] & (highs.sum(axis=1) == 1) & lows[:, 4] & (lows.sum(axis=1) == 1)
+
+
+def _equal_highs(c: Candles, step, np_rng):
+    """Pull candle 4's high to (almost) the level of candle 2's high"""
+    high = c.high.copy()
+    high[:, 4] = np.round(high[:, 2] - step[:, 0] * np_rng.uniform(0, 0.05, len(high)), 2)
+    return c._replace(high=high)
+
+
+def _liquidity_check(c: Candles, step):
+    level = c.high[:, 2]
+    others = np.max(c.high[:, [0, 1, 3]], axis=1)
+    return (c.high[:, 4] <= level) & (others < c.high[:, 4] - 0.2 * step[:, 0]) & (c.high[:, 5] > level)
+
+
+def _breaks(c: Candles, row: int) -> List[dict]:
+    """BOS/CHoCH events of one candidate; these short charts use 1-bar swings"""
+    events = detect_structure(c.open[row], c.high[row], c.low[row], c.close[row], width=1)
+    return [event for event in events if event["type"] in ("bos", "choch")]
+
+
+def _confirm_break(kind: str, index_key: str):
+    def confirm(c: Candles, row: int, keys: dict) -> bool:
+        breaks = [event for event in _breaks(c, row) if event["direction"] == "bullish"]
+        return len(breaks) == 1 and breaks[0]["type"] == kind and breaks[0]["index"] == keys[index_key] \
+            and breaks[0]["level"] == keys["structure_level"]
+    return confirm
+
+
+def _bos_check(c: Candles, step):
+    level = c.high[:, 1]
+    return (
+        (c.close[:, 1] > c.open[:, 0]) & (level > c.high[:, 0])
+        & (level > np.max(c.high[:, 2:5], axis=1))
+        & (c.close[:, 5] > level)
+    )
+
+
+def _choch_check(c: Candles, step):
+    level = c.high[:, 2]
+    return (
+        (level < c.high[:, 0]) & (level > c.high[:, 1])
+        & (level > np.max(c.high[:, 3:5], axis=1))
+        & (c.low[:, 3] < c.low[:, 1])
+        & (c.close[:, 5] > level)
+    )
+
+
+def _order_block_check(c: Candles, step):
+    bullish, bearish = order_blocks(c.open, c.high, c.low, c.close)
+    return (
+        bullish[:, 2] & (bullish.sum(axis=1) == 1) & ~bearish.any(axis=1)
+        & (c.close[:, 4] > c.open[:, 4]) & (c.low[:, 4] > c.high[:, 2])
+    )
+
+
+def _fvg_check(c: Candles, step):
+    bullish, bearish = fair_value_gaps(c.high, c.low)
+    return (
+        bullish[:, 2] & (bullish.sum(axis=1) == 1) & ~bearish.any(axis=1)
+        & (c.low[:, 3] - c.high[:, 1] >= 0.15 * step[:, 0])
+    )
+
+
+def _premium_discount_check(c: Candles, step):
+    return (np.argmax(c.high, axis=1) == 2) & (np.argmin(c.low, axis=1) == 5) & swing_highs(c.high)[:, 2]
+
+
+def _price(value) -> float:
+    return round(float(value), 2)
+
+
+PATTERNS: Dict[str, Pattern] = {
+    "candle": Pattern(
+        template=[1.5],
+        check=_candle_check,
+        keys=lambda c, row: {},
+        describe=lambda keys, bullish: ("Bullish candle" if bullish else "Bearish candle", ""),
+    ),
+    "swing": Pattern(
+        template=[1, 1, 1, -1, -1, 1, 1],
+        check=_swing_check,
+        keys=lambda c, row: {
+            "swing_high_idx": 2, "swing_high_price": _price(c.high[row, 2]),
+            "swing_low_idx": 4, "swing_low_price": _price(c.low[row, 4]),
+        },
+        prices=("swing_high_price", "swing_low_price"),
+        swaps=(("swing_high_idx", "swing_low_idx"), ("swing_high_price", "swing_low_price")),
+        describe=lambda keys, bullish: ("Uptrend" if bullish else "Downtrend", ""),
+    ),
+    "liquidity": Pattern(
+        template=[1, 1, 1, -0.8, 0.8, 1.6],
+        check=_liquidity_check,
+        prepare=_equal_highs,
+        keys=lambda c, row: {"liquidity_level": _price(c.high[row, 2])},
+        prices=("liquidity_level",),
+        direction_key=("liquidity_type", "buy_side", "sell_side"),
+        describe=lambda keys, bullish: (
+            ("BSL", "Stop losses dos vendedores estão ACIMA das máximas iguais") if bullish else
+            ("SSL", "Stop losses dos compradores estão ABAIXO das mínimas iguais")
+        ),
+    ),
+    "bos": Pattern(
+        template=[1, 1, -0.7, -0.6, 0.5, 1.6],
+        check=_bos_check,
+        keys=lambda c, row: {"structure_level": _price(c.high[row, 1]), "bos_candle_index": 5},
+        confirm=_confirm_break("bos", "bos_candle_index"),
+        prices=("structure_level",),
+        direction_key=("bos_type", "bullish", "bearish"),
+        describe=lambda keys, bullish: (
+            ("Bullish BOS", "Preço quebra ACIMA da máxima anterior = tendência de alta continua") if bullish else
+            ("Bearish BOS", "Preço quebra ABAIXO da mínima anterior = tendência de baixa continua")
+        ),
+    ),
+    "choch": Pattern(
+        template=[-1.2, -1, 1.0, -1.8, 0.9, 2.2],
+        check=_choch_check,
+        keys=lambda c, row: {"structure_level": _price(c.high[row, 2]), "choch_candle_index": 5},
+        confirm=_confirm_break("choch", "choch_candle_index"),
+        prices=("structure_level",),
+        direction_key=("choch_type", "bullish", "bearish"),
+        describe=lambda keys, bullish: (
+            ("Bullish CHoCH", "Downtrend acabando - preço quebra a última Lower High") if bullish else
+            ("Bearish CHoCH", "Uptrend acabando - preço quebra a última Higher Low")
+        ),
+    ),
+    "order_block": Pattern(
+        template=[0.3, -0.4, -0.6, 2.0, 1.2, 0.6],
+        check=_order_block_check,
+        keys=lambda c, row: {"ob_candle_index": 2, "ob_high": _price(c.high[row, 2]), "ob_low": _price(c.low[row, 2])},
+        prices=("ob_high", "ob_low"),
+        swaps=(("ob_high", "ob_low"),),
+        direction_key=("ob_type", "bullish", "bearish"),
+        describe=lambda keys, bullish: (
+            ("Bullish OB", "Última vela VERMELHA antes do movimento forte de ALTA") if bullish else
+            ("Bearish OB", "Última vela VERDE antes do movimento forte de QUEDA")
+        ),
+    ),
+    "fvg": Pattern(
+        template=[0.5, 0.6, 2.2, 0.6, -0.3],
+        check=_fvg_check,
+        keys=lambda c, row: {"fvg_candle_index": 2, "fvg_high": _price(c.low[row, 3]), "fvg_low": _price(c.high[row, 1])},
+        prices=("fvg_high", "fvg_low"),
+        swaps=(("fvg_high", "fvg_low"),),
+        direction_key=("fvg_type", "bullish", "bearish"),
+        describe=lambda keys, bullish: (
+            ("Bullish FVG", "Gap entre HIGH da vela 2 e LOW da vela 4") if bullish else
+            ("Bearish FVG", "Gap entre LOW da vela 2 e HIGH da vela 4")
+        ),
+    ),
+    "premium_discount": Pattern(
+        template=[1, 1, 1, -1, -1, -1, 0.5],
+        check=_premium_discount_check,
+        keys=lambda c, row: {
+            "swing_high": _price(c.high[row, 2]),
+            "swing_low": _price(c.low[row, 5]),
+            "equilibrium": _price((c.high[row, 2] + c.low[row, 5]) / 2),
+        },
+        prices=("swing_high", "swing_low", "equilibrium"),
+        swaps=(("swing_high", "swing_low"),),
+        describe=lambda keys, bullish: ("Premium/Discount", ""),
+    ),
+}
+
+
+# ==================== GENERATION ====================
+
+def _scenario(pattern: Pattern, c: Candles, row: int, pivot: float, bullish: bool) -> Optional[dict]:
+    keys = pattern.keys(c, row)
+    if pattern.confirm and not pattern.confirm(c, row, keys):
+        return None
+    rows = zip(c.open[row], c.high[row], c.low[row], c.close[row])
+    if bullish:
+        candles = [{"open": o, "high": h, "low": l, "close": cl} for o, h, l, cl in rows]
+    else:
+        # Mirror around the starting price: highs become lows and vice versa
+        mirror = lambda price: _price(2 * pivot - price)
+        candles = [{"open": mirror(o), "high": mirror(l), "low": mirror(h), "close": mirror(cl)} for o, h, l, cl in rows]
+        for key in pattern.prices:
+            keys[key] = mirror(keys[key])
+        for a, b in pattern.swaps:
+            keys[a], keys[b] = keys[b], keys[a]
+
+    scenario = {"candles": [
+        {"time": (START_DATE + timedelta(days=i)).isoformat(), **{k: float(v) for k, v in candle.items()}}
+        for i, candle in enumerate(candles)
+    ]}
+    name, description = pattern.describe(keys, bullish)
+    scenario["name"] = name
+    if description:
+        scenario["description"] = description
+    if pattern.direction_key:
+        key, bullish_value, bearish_value = pattern.direction_key
+        scenario[key] = bullish_value if bullish else bearish_value
+    scenario.update(keys)
+    return scenario
+
+
+def generate_scenarios(kind: str, count: int, rng: random.Random) -> List[dict]:
+    """`count` distinct verified scenarios of one kind, reproducible from rng"""
+    pattern = PATTERNS[kind]
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    scenarios = []
+    for _ in range(MAX_BATCHES):
+        candles, step, pivot = synthesize(pattern.template, BATCH_SIZE, np_rng)
+        if pattern.prepare:
+            candles = pattern.prepare(candles, step, np_rng)
+        accepted = np.flatnonzero(well_formed(candles) & pattern.check(candles, step))
+        directions = np_rng.random(len(accepted)) < 0.5
+        for row, bullish in zip(accepted, directions):
+            scenario = _scenario(pattern, candles, row, float(pivot[row, 0]), bool(bullish))
+            if scenario is None:
+                continue
+            scenarios.append(scenario)
+            if len(scenarios) == count:
+                return scenarios
+    raise RuntimeError(f"Could not generate {count} {kind} scenarios")
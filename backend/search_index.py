@@ -0,0 +1,192 @@
+"""
+Curriculum Search
+In-memory inverted index over lessons, lesson pages, level intros and
+exercise questions, with Portuguese/English tokenization, prefix matching and
+BM25 ranking.
+"""
+import re
+import math
+import bisect
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# Accent-stripped, lowercase
+STOPWORDS = frozenset("""
+a o e as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas
+para pra com sem que se ao aos como mais mas ou sua seu suas seus ele ela eles elas isso
+isto esse essa este esta ja nao sim muito muita entre quando onde qual quais ser sao foi
+tem ter ha
+the an and or of to in on at for by with from is are was were be been it its this that
+these those as if not no yes do does what which who how when where than then so can
+""".split())
+
+# Field weights: a hit in a title outranks one in body text
+TITLE_WEIGHT = 3.0
+TEXT_WEIGHT = 1.0
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_PENALTY = 0.7
+MAX_PREFIX_EXPANSIONS = 30
+SNIPPET_LENGTH = 160
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MARKDOWN_RE = re.compile(r"[#*_`>•✅❌]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, so 'Preço' and 'preco' match"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(fold(text)) if token not in STOPWORDS and (len(token) > 1 or token.isdigit())]
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(_MARKDOWN_RE.sub(" ", text or "").split())
+    return text if len(text) <= SNIPPET_LENGTH else text[:SNIPPET_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+class SearchIndex:
+    """Inverted index: term -> {doc number: weighted term frequency}"""
+
+    def __init__(self):
+        self.docs: List[dict] = []
+        self._lengths: List[float] = []
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._terms: List[str] = []
+        self._idf: Dict[str, float] = {}
+        self._avg_length = 1.0
+
+    def add(self, doc: dict, title: str, text: str):
+        """Index one document; doc is returned as-is in results"""
+        doc_number = len(self.docs)
+        self.docs.append({**doc, "snippet": _snippet(doc.get("snippet") or text)})
+
+        length = 0.0
+        for weight, field in ((TITLE_WEIGHT, title), (TEXT_WEIGHT, text)):
+            for token in tokenize(field or ""):
+                postings = self._postings[token]
+                postings[doc_number] = postings.get(doc_number, 0.0) + weight
+                length += weight
+        self._lengths.append(length)
+
+    def finalize(self):
+        """Compute ranking statistics and the sorted term list for prefix lookups"""
+        total = len(self.docs)
+        self._avg_length = (sum(self._lengths) / total) if total else 1.0
+        self._terms = sorted(self._postings)
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        self._postings = dict(self._postings)
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """The token itself plus indexed terms it is a prefix of"""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        start = bisect.bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            matches.setdefault(term, PREFIX_PENALTY)
+        return matches
+
+    def search(self, query: str, limit: int = 10, doc_type: Optional[str] = None) -> List[dict]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        for token in tokens:
+            token_scores: Dict[int, float] = {}
+            for term, factor in self._expand(token).items():
+                idf = self._idf[term]
+                for doc_number, tf in self._postings[term].items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_number] / self._avg_length)
+                    score = factor * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    if score > token_scores.get(doc_number, 0.0):
+                        token_scores[doc_number] = score
+            for doc_number, score in token_scores.items():
+                scores[doc_number] += score
+                matched[doc_number] += 1
+
+        # Documents matching every query word rank above partial matches
+        ranked = sorted(
+            scores,
+            key=lambda n: (matched[n], scores[n]),
+            reverse=True
+        )
+        results = []
+        for doc_number in ranked:
+            doc = self.docs[doc_number]
+            if doc_type and doc["type"] != doc_type:
+                continue
+            results.append({**doc, "score": round(scores[doc_number], 4), "matched_terms": matched[doc_number], "total_terms": len(tokens)})
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self) -> dict:
+        return {"documents": len(self.docs), "terms": len(self._terms)}
+
+
+def _join(values: Iterable) -> str:
+    return " ".join(str(v) for v in values if v)
+
+
+def build_search_index(lessons: List[dict], category_ids: Iterable[str], levels: Iterable[int] = range(1, 11)) -> SearchIndex:
+    """Index LESSONS_DATA plus the curriculum content of every category, read through the content loader"""
+    import content
+
+    index = SearchIndex()
+    levels = list(levels)
+
+    for lesson in lessons:
+        quiz = lesson.get("quiz") or {}
+        index.add(
+            {"type": "lesson", "id": lesson["id"], "title": lesson.get("title", ""), "level": lesson.get("level"), "snippet": lesson.get("description")},
+            lesson.get("title", ""),
+            _join([lesson.get("description"), lesson.get("content"), quiz.get("question"), _join(quiz.get("options", [])), quiz.get("explanation")])
+        )
+
+    for category_id in category_ids:
+        for page in content.get_category_lesson(category_id).get("pages", []):
+            index.add(
+                {"type": "lesson_page", "id": f"{category_id}-page-{page['page']}", "title": page.get("title", ""), "category_id": category_id, "page": page["page"]},
+                _join([page.get("title"), page.get("subtitle")]),
+                _join([page.get("content"), page.get("tip")])
+            )
+
+        for level in levels:
+            intro = content.get_lesson_intro(category_id, level)
+            if intro.get("has_intro"):
+                index.add(
+                    {"type": "intro", "id": f"{category_id}-intro-{level}", "title": intro.get("title", ""), "category_id": category_id, "level": level},
+                    _join([intro.get("title"), intro.get("subtitle")]),
+                    _join([intro.get("content"), _join(intro.get("key_points", []))])
+                )
+
+            for ex in content.get_config_exercises(category_id, level) or []:
+                index.add(
+                    {"type": "exercise", "id": ex["id"], "title": ex.get("question", ""), "category_id": category_id, "level": level},
+                    ex.get("question", ""),
+                    _join([_join(ex.get("options", [])), ex.get("explanation"), ex.get("feedback_wrong")])
+                )
+
+            for i, row in enumerate(content.get_level_data(category_id, level) or []):
+                title, explanation, question, options = row[0], row[1], row[2], row[3]
+                index.add(
+                    {"type": "question", "id": f"{category_id}-L{level}-Q{i+1}", "title": title, "category_id": category_id, "level": level, "snippet": question},
+                    title,
+                    _join([explanation, question, _join(options)])
+                )
+
+    index.finalize()
+    return index
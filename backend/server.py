@@ -1,25 +1,39 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Header, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import json
+import re
+import time
+import asyncio
+import threading
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import secrets
 from mailersend import EmailBuilder, MailerSendClient
 from supabase import create_client, Client
-from lesson_intros import get_lesson_intro, LESSON_INTROS
-from category_lessons import get_category_lesson, get_lesson_page, CATEGORY_LESSONS
+from content import get_lesson_intro, get_category_lesson, get_lesson_page
 from real_market import (
-    generate_realistic_candles, AVAILABLE_ASSETS, validate_entry,
-    calculate_risk_reward, calculate_result_in_r, calculate_discipline_score,
+    generate_realistic_candles, AVAILABLE_ASSETS, ASSET_BASE_PRICES, VALID_TIMEFRAMES,
+    validate_entry, calculate_risk_reward, calculate_result_in_r, calculate_discipline_score,
     generate_insights, Candle, ORBRange, TradeEntry, TradeResult, ReplaySession
 )
+from candle_pool import CandleSeriesPool, SESSION_CANDLES
+from candle_format import negotiate_candle_format, candle_response
+from smc_detection import StructureTracker
+from review_scheduler import ReviewScheduler, answer_quality
+from progress_summary import ProgressCache, build_levels
+from http_cache import StaticBody, StaticBodyCache, conditional_response
+from compression import CompressionMiddleware, PrecompressedStaticFiles
+from idempotency import IdempotencyStore
+from leaderboard import Leaderboards, weekly_xp_fields
+from password_hashing import PasswordHasher, DEFAULT_WORKERS as DEFAULT_HASH_WORKERS
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -149,6 +163,15 @@ class LessonComplete(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
+# bcrypt runs on its own bounded pool, never on the event loop
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', str(DEFAULT_HASH_WORKERS))),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '0')) or None
+)
+
+# Results of XP-awarding submissions by Idempotency-Key, so retries don't award twice
+idempotent_requests = IdempotencyStore(supabase)
+
 def is_admin_user(user_id: str) -> bool:
     """Check if user has admin privileges (everything unlocked for testing)"""
     if not user_id:
@@ -171,15 +194,6 @@ def calculate_rank(xp: int) -> str:
     else:
         return "Market Engineer"
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
-
-def verify_password(password: str, password_hash: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
-
 def get_user_response(user_doc: dict) -> UserResponse:
     """Convert user document to UserResponse with rank"""
     return UserResponse(
@@ -684,7 +698,7 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
     user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await password_hasher.hash(user_data.password),
         is_verified=not EMAIL_VERIFICATION_ENABLED,  # Auto-verify if disabled
         verification_token=verification_token if EMAIL_VERIFICATION_ENABLED else None,
         verification_token_expires=token_expires if EMAIL_VERIFICATION_ENABLED else None
@@ -707,6 +721,7 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
     }
     
     supabase.table('users').insert(user_dict).execute()
+    leaderboards.add_user(user_dict)
     
     # Send verification email only if enabled
     if EMAIL_VERIFICATION_ENABLED:
@@ -800,6 +815,11 @@ async def resend_verification(request: ResendVerificationRequest, background_tas
     
     return {"message": "Verification email sent. Please check your inbox."}
 
+@api_router.get("/auth/hashing-stats")
+async def get_password_hashing_stats():
+    """Queue depth and timings of the bcrypt worker pool"""
+    return password_hasher.stats()
+
 @api_router.post("/auth/login", response_model=UserResponse)
 async def login(login_data: UserLogin):
     """Login user"""
@@ -810,7 +830,7 @@ async def login(login_data: UserLogin):
     
     user = result.data[0]
     
-    if not verify_password(login_data.password, user['password_hash']):
+    if not await password_hasher.verify(login_data.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Check if email is verified (only if verification is enabled)
@@ -837,19 +857,9 @@ async def get_user(user_id: str):
 
 # ==================== LESSON ROUTES ====================
 
-@api_router.get("/lessons")
-async def get_lessons(user_id: Optional[str] = None):
-    """Get all lessons with optional user progress"""
+def build_lessons_list(completed_lessons: List[str], admin_mode: bool) -> List[dict]:
+    """Lessons with completion and unlock flags for one user's progress"""
     lessons = []
-    completed_lessons = []
-    admin_mode = False
-    
-    if user_id:
-        result = supabase.table('users').select('completed_lessons, is_admin').eq('id', user_id).execute()
-        if result.data:
-            completed_lessons = result.data[0].get('completed_lessons', []) or []
-            admin_mode = result.data[0].get('is_admin', False)
-    
     for i, lesson in enumerate(LESSONS_DATA):
         # Admin users get everything unlocked for testing
         if admin_mode:
@@ -868,9 +878,27 @@ async def get_lessons(user_id: Optional[str] = None):
             "is_completed": lesson['id'] in completed_lessons,
             "is_unlocked": is_unlocked
         })
-    
     return lessons
 
+# Anonymous lesson list never changes between deploys
+ANONYMOUS_LESSONS_BODY = StaticBody.from_content(build_lessons_list([], False))
+
+@api_router.get("/lessons")
+async def get_lessons(user_id: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    """Get all lessons with optional user progress"""
+    if not user_id:
+        return conditional_response(ANONYMOUS_LESSONS_BODY, if_none_match)
+    
+    completed_lessons = []
+    admin_mode = False
+    
+    result = supabase.table('users').select('completed_lessons, is_admin').eq('id', user_id).execute()
+    if result.data:
+        completed_lessons = result.data[0].get('completed_lessons', []) or []
+        admin_mode = result.data[0].get('is_admin', False)
+    
+    return build_lessons_list(completed_lessons, admin_mode)
+
 @api_router.get("/lessons/{lesson_id}")
 async def get_lesson(lesson_id: str, user_id: Optional[str] = None):
     """Get a specific lesson"""
@@ -907,8 +935,14 @@ async def get_lesson(lesson_id: str, user_id: Optional[str] = None):
     }
 
 @api_router.post("/lessons/{lesson_id}/complete")
-async def complete_lesson(lesson_id: str, data: LessonComplete):
+async def complete_lesson(lesson_id: str, data: LessonComplete, response: Response, idempotency_key: Optional[str] = Header(None)):
     """Complete a lesson and award XP"""
+    return await idempotent_requests.run(
+        idempotency_key, ["lesson-complete", lesson_id, data.model_dump()],
+        lambda: record_lesson_completion(lesson_id, data), response
+    )
+
+async def record_lesson_completion(lesson_id: str, data: LessonComplete):
     lesson = next((l for l in LESSONS_DATA if l['id'] == lesson_id), None)
     
     if not lesson:
@@ -936,12 +970,15 @@ async def complete_lesson(lesson_id: str, data: LessonComplete):
     new_xp = user['xp'] + lesson['xp_reward']
     new_level = (new_xp // 100) + 1
     completed_lessons = completed_lessons + [lesson_id]
+    weekly = weekly_xp_fields(user, lesson['xp_reward'])
     
     supabase.table('users').update({
         'xp': new_xp,
         'level': new_level,
-        'completed_lessons': completed_lessons
+        'completed_lessons': completed_lessons,
+        **weekly
     }).eq('id', data.user_id).execute()
+    leaderboards.award(user, new_xp, weekly['weekly_xp'])
     
     logger.info(f"User {data.user_id} completed lesson {lesson_id}, gained {lesson['xp_reward']} XP")
     
@@ -1049,12 +1086,45 @@ async def upgrade_subscription(data: SubscriptionUpgrade):
     
     return {"message": f"Upgraded to {data.plan}", "subscription": data.plan}
 
+# ==================== SEARCH ====================
+
+from search_index import build_search_index
+
+search_index = None
+search_index_lock = threading.Lock()
+
+def get_search_index():
+    """Build the curriculum search index once per worker, on its first search"""
+    global search_index
+    if search_index is None:
+        with search_index_lock:
+            if search_index is None:
+                started = time.perf_counter()
+                search_index = build_search_index(LESSONS_DATA, [category['id'] for category in get_all_categories()])
+                logger.info(f"Built search index: {search_index.stats()} in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return search_index
+
+@api_router.get("/search")
+async def search_curriculum(q: str, limit: int = 10, type: Optional[str] = None):
+    """Ranked full-text search over lessons, lesson pages, intros and exercises (prefix matching on each word)"""
+    limit = max(1, min(limit, 50))
+    index = search_index or await asyncio.to_thread(get_search_index)
+    started = time.perf_counter()
+    results = index.search(q, limit=limit, doc_type=type)
+    return {
+        "query": q,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": results
+    }
+
 # ==================== PROP FIRM ADS ====================
 
+PROP_FIRM_ADS_BODY = StaticBody.from_content(PROP_FIRM_ADS)
+
 @api_router.get("/ads/propfirms")
-async def get_prop_firm_ads():
+async def get_prop_firm_ads(if_none_match: Optional[str] = Header(None)):
     """Get prop firm advertisements"""
-    return PROP_FIRM_ADS
+    return conditional_response(PROP_FIRM_ADS_BODY, if_none_match)
 
 # ==================== INIT DATA ROUTE ====================
 
@@ -1155,15 +1225,15 @@ async def change_password(data: PasswordChangeRequest):
     user = result.data[0]
     
     # Verify current password
-    if not verify_password(data.current_password, user['password_hash']):
+    if not await password_hasher.verify(data.current_password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
     # Check new password is different
-    if verify_password(data.new_password, user['password_hash']):
+    if await password_hasher.verify(data.new_password, user['password_hash']):
         raise HTTPException(status_code=400, detail="New password must be different from current password")
     
     # Update password in Supabase
-    new_hash = hash_password(data.new_password)
+    new_hash = await password_hasher.hash(data.new_password)
     supabase.table('users').update({
         'password_hash': new_hash
     }).eq('id', data.user_id).execute()
@@ -1271,7 +1341,7 @@ async def disable_2fa(data: TwoFactorDisableRequest):
     user = user_result.data[0]
     
     # Verify password
-    if not verify_password(data.password, user['password_hash']):
+    if not await password_hasher.verify(data.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Incorrect password")
     
     # Check if 2FA exists
@@ -1409,43 +1479,111 @@ async def get_security_activity(user_id: str, limit: int = 50):
 # ==================== CURRICULUM ROUTES (NEW LEARNING SYSTEM) ====================
 
 from curriculum import (
-    CURRICULUM_STRUCTURE,
+    CURRICULUM_TIERS_JSON,
+    CURRICULUM_CATEGORIES_JSON,
+    CATEGORY_JSON,
     get_all_categories,
     get_category_by_id,
     generate_exercises_with_ai,
+    stream_exercises_with_ai,
     generate_fallback_exercises
 )
+import llm_client
+from exercise_jobs import ExerciseJobQueue
+from single_flight import SingleFlight, CacheRowLease
 
 class ExerciseComplete(BaseModel):
     user_id: str
     exercise_id: str
     is_correct: bool
 
+def save_exercise_cache(cache_key: str, category_id: str, level: int, exercises: List[dict]):
+    """Upsert a generated exercise set into interactive_exercise_cache"""
+    cache_data = {
+        "cache_key": cache_key,
+        "category_id": category_id,
+        "level": level,
+        "exercises": exercises,
+        "generated_at": datetime.now(timezone.utc).isoformat()
+    }
+    existing = supabase.table('interactive_exercise_cache').select('cache_key').eq('cache_key', cache_key).execute()
+    if existing.data:
+        supabase.table('interactive_exercise_cache').update(cache_data).eq('cache_key', cache_key).execute()
+    else:
+        supabase.table('interactive_exercise_cache').insert(cache_data).execute()
+
+def negotiate_stream_format(accept: Optional[str]) -> str:
+    """SSE when the client asks for text/event-stream, NDJSON otherwise"""
+    return "sse" if accept and "text/event-stream" in accept else "ndjson"
+
+exercise_flights = SingleFlight()
+exercise_lease = CacheRowLease(supabase)
+
+# SM-2 review schedule per user, fed by every graded answer
+review_scheduler = ReviewScheduler(supabase)
+
+# Every category's levels for one user, from one query; dropped on progress writes
+progress_cache = ProgressCache(supabase, [category['id'] for category in get_all_categories()])
+
+# Global, weekly and per-category XP rankings; loaded at startup, then updated per award
+leaderboards = Leaderboards()
+leaderboard_loader: Optional[asyncio.Task] = None
+
+async def generate_exercises_once(cache_key: str, category_id: str, level: int, generate) -> List[dict]:
+    """Generate and cache a level once, however many requests and workers miss it together"""
+    row = {"category_id": category_id, "level": level}
+    return await exercise_flights.do(cache_key, lambda: exercise_lease.generate_once(cache_key, row, generate))
+
+async def generate_and_cache_exercises(category_id: str, category_name: str, level: int):
+    """Background job: generate a level with the LLM and store it in the cache"""
+    await generate_exercises_once(
+        ExerciseJobQueue.job_key(category_id, level), category_id, level,
+        lambda: generate_exercises_with_ai(category_id, category_name, level)
+    )
+    logger.info(f"Exercises ready for {category_id} level {level}")
+
+exercise_jobs = ExerciseJobQueue(
+    generate_and_cache_exercises,
+    concurrency=int(os.environ.get('EXERCISE_JOB_CONCURRENCY', '2'))
+)
+
+def enqueue_missing_exercise_levels():
+    """Queue generation for every category/level that has no cached exercises yet"""
+    # Only rows with a first exercise count; empty rows are in-progress generation leases
+    cached = supabase.table('interactive_exercise_cache').select('cache_key,first_id:exercises->0->>id').execute()
+    cached_keys = {row['cache_key'] for row in (cached.data or []) if row.get('first_id')}
+    queued = 0
+    for category in get_all_categories():
+        for level in range(1, 11):
+            if ExerciseJobQueue.job_key(category['id'], level) not in cached_keys:
+                if exercise_jobs.enqueue(category['id'], category['name'], level):
+                    queued += 1
+    logger.info(f"Queued {queued} exercise levels for background generation")
+
+CURRICULUM_TIERS_BODY = StaticBody(CURRICULUM_TIERS_JSON)
+CURRICULUM_CATEGORIES_BODY = StaticBody(CURRICULUM_CATEGORIES_JSON)
+CATEGORY_BODIES = {category_id: StaticBody(body) for category_id, body in CATEGORY_JSON.items()}
+
+# Lesson intros and pages, memoized per URL parameters
+lesson_content_bodies = StaticBodyCache()
+
 @api_router.get("/curriculum/tiers")
-async def get_curriculum_tiers():
+async def get_curriculum_tiers(if_none_match: Optional[str] = Header(None)):
     """Get all curriculum tiers with categories"""
-    result = []
-    for tier_id, tier_data in CURRICULUM_STRUCTURE.items():
-        result.append({
-            "id": tier_id,
-            "name": tier_data['name'],
-            "order": tier_data['order'],
-            "categories": tier_data['categories']
-        })
-    return sorted(result, key=lambda x: x['order'])
+    return conditional_response(CURRICULUM_TIERS_BODY, if_none_match)
 
 @api_router.get("/curriculum/categories")
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(None)):
     """Get all categories with metadata"""
-    return get_all_categories()
+    return conditional_response(CURRICULUM_CATEGORIES_BODY, if_none_match)
 
 @api_router.get("/curriculum/categories/{category_id}")
-async def get_category(category_id: str):
+async def get_category(category_id: str, if_none_match: Optional[str] = Header(None)):
     """Get a specific category"""
-    category = get_category_by_id(category_id)
-    if not category:
+    static = CATEGORY_BODIES.get(category_id)
+    if static is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    return conditional_response(static, if_none_match)
 
 @api_router.get("/curriculum/categories/{category_id}/levels")
 async def get_category_levels(category_id: str, user_id: Optional[str] = None):
@@ -1454,72 +1592,42 @@ async def get_category_levels(category_id: str, user_id: Optional[str] = None):
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    # Get user progress and admin status if user_id provided
-    user_progress = {}
-    admin_mode = False
-    if user_id:
-        # Check if admin
-        user_result = supabase.table('users').select('is_admin').eq('id', user_id).execute()
-        if user_result.data:
-            admin_mode = user_result.data[0].get('is_admin', False)
-        
-        result = supabase.table('user_progress').select('*').eq('user_id', user_id).eq('category_id', category_id).execute()
-        if result.data:
-            # Build levels dict from progress
-            for prog in result.data:
-                user_progress[str(prog.get('level', 1))] = {
-                    'completed': prog.get('exercises_completed', 0)
-                }
-    
-    levels = []
-    for level_num in range(1, 11):
-        level_key = str(level_num)
-        level_progress = user_progress.get(level_key, {})
-        completed_exercises = level_progress.get('completed', 0)
-        
-        # Admin users get everything unlocked for testing
-        if admin_mode:
-            is_unlocked = True
-        else:
-            # Level is unlocked if it's level 1 OR previous level has 10 completed
-            is_unlocked = level_num == 1
-            if level_num > 1:
-                prev_level_progress = user_progress.get(str(level_num - 1), {})
-                is_unlocked = prev_level_progress.get('completed', 0) >= 10
-        
-        levels.append({
-            "level": level_num,
-            "category_id": category_id,
-            "total_exercises": 10,
-            "completed_exercises": completed_exercises,
-            "is_completed": completed_exercises >= 10,
-            "is_unlocked": is_unlocked,
-            "xp_per_exercise": 5 + (level_num * 2)
-        })
-    
-    return levels
+    summary = progress_cache.get(user_id) if user_id else None
+    if summary is None:
+        return build_levels(category_id, {})
+    return summary["categories"][category_id]["levels"]
+
+@api_router.get("/progress/{user_id}")
+async def get_progress_summary(user_id: str):
+    """Unlock state, completion and XP for every category and level"""
+    summary = progress_cache.get(user_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return summary
 
 @api_router.get("/curriculum/categories/{category_id}/levels/{level}/intro")
-async def get_level_intro(category_id: str, level: int):
-    """Get the lesson introduction for a category and level"""
-    intro = get_lesson_intro(category_id, level)
-    return intro
+async def get_level_intro(category_id: str, level: int, html: bool = False, if_none_match: Optional[str] = Header(None)):
+    """Get the lesson introduction for a category and level (html=true adds pre-rendered content_html)"""
+    static = lesson_content_bodies.get(("intro", category_id, level, html), lambda: get_lesson_intro(category_id, level, html))
+    return conditional_response(static, if_none_match)
 
 @api_router.get("/curriculum/categories/{category_id}/lesson")
-async def get_category_lesson_info(category_id: str):
-    """Get the full lesson/book for a category"""
-    lesson = get_category_lesson(category_id)
-    return lesson
+async def get_category_lesson_info(category_id: str, html: bool = False, if_none_match: Optional[str] = Header(None)):
+    """Get the full lesson/book for a category (html=true adds pre-rendered content_html per page)"""
+    static = lesson_content_bodies.get(("lesson", category_id, html), lambda: get_category_lesson(category_id, html))
+    return conditional_response(static, if_none_match)
 
 @api_router.get("/curriculum/categories/{category_id}/lesson/page/{page_number}")
-async def get_category_lesson_page(category_id: str, page_number: int):
-    """Get a specific page of the category lesson"""
-    page = get_lesson_page(category_id, page_number)
-    return page
+async def get_category_lesson_page(category_id: str, page_number: int, html: bool = False, if_none_match: Optional[str] = Header(None)):
+    """Get a specific page of the category lesson (html=true adds pre-rendered content_html)"""
+    static = lesson_content_bodies.get(("page", category_id, page_number, html), lambda: get_lesson_page(category_id, page_number, html))
+    return conditional_response(static, if_none_match)
 
-@api_router.get("/curriculum/categories/{category_id}/levels/{level}/exercises")
-async def get_level_exercises(category_id: str, level: int, user_id: Optional[str] = None):
-    """Get exercises for a specific level - generates if not cached"""
+class IncompleteExerciseSet(Exception):
+    """An inline generation came back short of a full level; it is not cached"""
+
+def load_level_exercises(category_id: str, level: int, user_id: Optional[str]) -> Tuple[dict, Optional[List[dict]], List[str]]:
+    """Validate a category level, then read its cached exercises (None on a miss) and the user's completed ids"""
     category = get_category_by_id(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
@@ -1527,42 +1635,111 @@ async def get_level_exercises(category_id: str, level: int, user_id: Optional[st
     if level < 1 or level > 10:
         raise HTTPException(status_code=400, detail="Level must be between 1 and 10")
     
-    # Check if exercises are cached in DB
-    cache_key = f"{category_id}-level-{level}"
-    cached_result = supabase.table('interactive_exercise_cache').select('*').eq('cache_key', cache_key).execute()
-    
-    if cached_result.data and cached_result.data[0].get('exercises'):
-        exercises = cached_result.data[0]['exercises']
-    else:
-        # Generate exercises
-        logger.info(f"Generating exercises for {category_id} level {level}")
-        exercises = await generate_exercises_with_ai(category_id, category['name'], level)
-        
-        # Cache the exercises (upsert)
-        cache_data = {
-            "cache_key": cache_key,
-            "category_id": category_id,
-            "level": level,
-            "exercises": exercises,
-            "generated_at": datetime.now(timezone.utc).isoformat()
-        }
-        if cached_result.data:
-            supabase.table('interactive_exercise_cache').update(cache_data).eq('cache_key', cache_key).execute()
-        else:
-            supabase.table('interactive_exercise_cache').insert(cache_data).execute()
+    cache_key = ExerciseJobQueue.job_key(category_id, level)
+    cached_result = supabase.table('interactive_exercise_cache').select('exercises').eq('cache_key', cache_key).execute()
+    cached = cached_result.data[0]['exercises'] if cached_result.data and cached_result.data[0].get('exercises') else None
     
-    # Add user completion status if user_id provided
+    completed_ids = []
     if user_id:
-        progress_result = supabase.table('user_progress').select('*').eq('user_id', user_id).eq('category_id', category_id).eq('level', level).execute()
-        completed_ids = []
+        progress_result = supabase.table('user_progress').select('completed_exercises').eq('user_id', user_id).eq('category_id', category_id).eq('level', level).execute()
         if progress_result.data:
             completed_ids = progress_result.data[0].get('completed_exercises', []) or []
-        
+    
+    return category, cached, completed_ids
+
+def fallback_level_exercises(category: dict, level: int) -> List[dict]:
+    """The static set for a level with no cached AI set; the AI set replaces it once the job finishes"""
+    logger.info(f"Exercise cache miss for {category['id']} level {level}, queueing generation")
+    exercise_jobs.enqueue(category['id'], category['name'], level)
+    return generate_fallback_exercises(category['id'], category['name'], level)
+
+@api_router.get("/curriculum/categories/{category_id}/levels/{level}/exercises")
+async def get_level_exercises(category_id: str, level: int, user_id: Optional[str] = None):
+    """Get exercises for a specific level - generates if not cached"""
+    category, exercises, completed_ids = load_level_exercises(category_id, level, user_id)
+    if exercises is None:
+        exercises = fallback_level_exercises(category, level)
+    
+    # Add user completion status if user_id provided
+    if user_id:
         for ex in exercises:
             ex['is_completed'] = ex.get('id') in completed_ids
     
     return exercises
 
+@api_router.get("/curriculum/categories/{category_id}/levels/{level}/exercises/stream")
+async def stream_level_exercises(category_id: str, level: int, user_id: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """Stream a level's exercises as NDJSON (or SSE).
+
+    On a cache miss the LLM generates the level inline, each exercise sent as
+    soon as it is parsed, only when the provider really streams; otherwise the
+    static set is sent at once and generation is queued in the background.
+    """
+    category, cached, completed_ids = load_level_exercises(category_id, level, user_id)
+    cache_key = ExerciseJobQueue.job_key(category_id, level)
+    
+    sse = negotiate_stream_format(accept) == "sse"
+    
+    def encode(ex: dict) -> str:
+        line = json.dumps({**ex, "is_completed": ex.get('id') in completed_ids})
+        return f"data: {line}\n\n" if sse else f"{line}\n"
+    
+    async def exercise_lines():
+        if cached or not llm_client.streams_live():
+            for ex in cached or fallback_level_exercises(category, level):
+                yield encode(ex)
+            return
+        
+        # Exercises parsed by our own generation are forwarded as they arrive; if another
+        # request or worker is already generating this level we get the full set at the end
+        streamed: asyncio.Queue = asyncio.Queue()
+        
+        async def generate():
+            exercises = []
+            async for ex in stream_exercises_with_ai(category_id, category['name'], level):
+                exercises.append(ex)
+                streamed.put_nowait(ex)
+            if len(exercises) < 10:
+                raise IncompleteExerciseSet(f"{len(exercises)} exercises generated for {cache_key}")
+            return exercises
+        
+        task = asyncio.create_task(generate_exercises_once(cache_key, category_id, level, generate))
+        sent = 0
+        while True:
+            getter = asyncio.create_task(streamed.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                sent += 1
+                yield encode(getter.result())
+                continue
+            getter.cancel()
+            break
+        
+        try:
+            exercises = await task
+        except IncompleteExerciseSet as e:
+            # Complete what was sent from the static set, without caching the mix
+            logger.warning(f"{e}, completing from the static set")
+            exercises = fallback_level_exercises(category, level)
+        for ex in exercises[sent:]:
+            yield encode(ex)
+    
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(exercise_lines(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@api_router.get("/curriculum/jobs")
+async def get_exercise_jobs():
+    """Status of the background exercise generation queue"""
+    return exercise_jobs.summary()
+
+@api_router.get("/curriculum/jobs/{category_id}/{level}")
+async def get_exercise_job(category_id: str, level: int):
+    """Status of the generation job for one category level"""
+    job = exercise_jobs.get(category_id, level)
+    if not job:
+        raise HTTPException(status_code=404, detail="No generation job for this level")
+    return job
+
 class ExerciseImageUpdate(BaseModel):
     exercise_id: str
     image_url: str
@@ -1642,8 +1819,14 @@ async def get_single_exercise(exercise_id: str):
     raise HTTPException(status_code=404, detail="Exercise not found")
 
 @api_router.post("/curriculum/exercises/complete")
-async def complete_exercise(data: ExerciseComplete):
+async def complete_exercise(data: ExerciseComplete, response: Response, idempotency_key: Optional[str] = Header(None)):
     """Mark an exercise as complete and award XP"""
+    return await idempotent_requests.run(
+        idempotency_key, ["exercise-complete", data.model_dump()],
+        lambda: record_exercise_completion(data), response
+    )
+
+async def record_exercise_completion(data: ExerciseComplete):
     # Parse exercise ID: category-Llevel-Eexercise
     parts = data.exercise_id.split('-')
     if len(parts) < 3:
@@ -1699,11 +1882,17 @@ async def complete_exercise(data: ExerciseComplete):
     # Update user XP
     new_xp = user['xp'] + xp_reward
     new_level = (new_xp // 100) + 1
+    weekly = weekly_xp_fields(user, xp_reward)
     
     supabase.table('users').update({
         'xp': new_xp,
-        'level': new_level
+        'level': new_level,
+        **weekly
     }).eq('id', data.user_id).execute()
+    leaderboards.award(user, new_xp, weekly['weekly_xp'], {category_id: xp_reward})
+    
+    progress_cache.invalidate(data.user_id)
+    review_scheduler.record_safely(data.user_id, [(data.exercise_id, answer_quality(data.is_correct))])
     
     logger.info(f"User {data.user_id} completed exercise {data.exercise_id}, XP: +{xp_reward}")
     
@@ -1774,6 +1963,26 @@ async def get_category_progress(user_id: str, category_id: str):
 # In-memory storage for active sessions (in production, use database)
 active_replay_sessions = {}
 
+# Ready-made candle series so starting a session never generates on the request path
+candle_pool = CandleSeriesPool()
+
+# One lock per session so commands on the same replay never interleave,
+# while unrelated sessions never wait on each other
+replay_session_locks: Dict[str, asyncio.Lock] = {}
+
+# Incremental SMC annotations (swings, BOS/CHoCH, FVGs, order blocks) per
+# session, fed one bar at a time as the replay advances
+replay_structure_trackers: Dict[str, StructureTracker] = {}
+
+def get_structure_tracker(session: ReplaySession) -> StructureTracker:
+    """The session's tracker, caught up with the visible candles"""
+    tracker = replay_structure_trackers.get(session.id)
+    if tracker is None:
+        tracker = replay_structure_trackers[session.id] = StructureTracker()
+    if len(tracker) < session.current_candle_index:
+        tracker.extend(session.candles[len(tracker):session.current_candle_index])
+    return tracker
+
 class StartReplayRequest(BaseModel):
     user_id: str
     asset: str = "EURUSD"
@@ -1783,6 +1992,7 @@ class MarkORBRequest(BaseModel):
     session_id: str
     high: float
     low: float
+    seq: Optional[int] = None  # Last session seq seen by the client
 
 class EnterTradeRequest(BaseModel):
     session_id: str
@@ -1790,6 +2000,7 @@ class EnterTradeRequest(BaseModel):
     entry_price: float
     stop_loss: float
     take_profit: Optional[float] = None
+    seq: Optional[int] = None
 
 class CompleteTradeRequest(BaseModel):
     session_id: str
@@ -1798,31 +2009,75 @@ class CompleteTradeRequest(BaseModel):
     emotion_after: str
     rule_violation: bool
     violation_types: List[str] = []
+    seq: Optional[int] = None
+
+def check_replay_seq(session: ReplaySession, seq: Optional[int]):
+    """Reject a command issued against an older session state"""
+    if seq is not None and seq != session.seq:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Stale command: session is at seq {session.seq}, got {seq}"
+        )
+
+class ReplayCommand:
+    """One mutating command on a replay session, run while holding its lock"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+        self.changed = True
+
+    def unchanged(self):
+        """The command turned out to be a no-op: keep the seq the client sent"""
+        if self.changed:
+            self.changed = False
+            self.session.seq -= 1
+
+@asynccontextmanager
+async def replay_session_command(session_id: str, seq: Optional[int] = None):
+    """Run a mutating command on a replay session under its lock.
+
+    Stale commands are rejected before waiting on the lock and re-checked
+    once it is held. Inside the block session.seq already holds the seq the
+    command leaves behind, so responses must be built there; it is rolled
+    back if the command fails or calls unchanged().
+    """
+    session = active_replay_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    check_replay_seq(session, seq)
+    
+    lock = replay_session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        # The session may have been ended or advanced while we waited
+        if active_replay_sessions.get(session_id) is not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        check_replay_seq(session, seq)
+        command = ReplayCommand(session)
+        session.seq += 1
+        try:
+            yield command
+        except BaseException:
+            command.unchanged()
+            raise
+
+AVAILABLE_ASSETS_BODY = StaticBody.from_content(AVAILABLE_ASSETS)
 
 @api_router.get("/real-market/assets")
-async def get_available_assets():
+async def get_available_assets(if_none_match: Optional[str] = Header(None)):
     """Get list of available assets for replay"""
-    return AVAILABLE_ASSETS
+    return conditional_response(AVAILABLE_ASSETS_BODY, if_none_match)
 
 @api_router.post("/real-market/start-session")
-async def start_replay_session(data: StartReplayRequest):
+async def start_replay_session(data: StartReplayRequest, accept: Optional[str] = Header(None)):
     """Start a new market replay session with specified timeframe"""
-    # Generate candles for the session
-    base_prices = {
-        "EURUSD": 1.08,
-        "GBPUSD": 1.26,
-        "BTCUSD": 42000,
-        "SPX500": 4800,
-        "GOLD": 2000,
-        "AAPL": 180
-    }
-    
     # Validate timeframe
-    valid_timeframes = ["1m", "5m", "15m"]
-    timeframe = data.timeframe if data.timeframe in valid_timeframes else "15m"
+    timeframe = data.timeframe if data.timeframe in VALID_TIMEFRAMES else "15m"
     
-    base_price = base_prices.get(data.asset, 100)
-    candles = generate_realistic_candles(100, base_price, timeframe)
+    # Take a pre-generated series, only generating inline if the pool is empty
+    candles = candle_pool.pop(data.asset, timeframe)
+    if candles is None:
+        base_price = ASSET_BASE_PRICES.get(data.asset, 100)
+        candles = generate_realistic_candles(SESSION_CANDLES, base_price, timeframe)
     
     session = ReplaySession(
         user_id=data.user_id,
@@ -1837,7 +2092,7 @@ async def start_replay_session(data: StartReplayRequest):
     # Return only visible candles
     visible_candles = candles[:session.current_candle_index]
     
-    return {
+    return candle_response({
         "session_id": session.id,
         "asset": data.asset,
         "timeframe": "15m",
@@ -1845,11 +2100,13 @@ async def start_replay_session(data: StartReplayRequest):
         "current_index": session.current_candle_index,
         "total_candles": len(candles),
         "orb_range": None,
-        "active_trade": None
-    }
+        "active_trade": None,
+        "structure": get_structure_tracker(session).events,
+        "seq": session.seq
+    }, negotiate_candle_format(accept))
 
 @api_router.get("/real-market/session/{session_id}")
-async def get_session_state(session_id: str):
+async def get_session_state(session_id: str, accept: Optional[str] = Header(None)):
     """Get current state of a replay session"""
     session = active_replay_sessions.get(session_id)
     if not session:
@@ -1857,7 +2114,7 @@ async def get_session_state(session_id: str):
     
     visible_candles = session.candles[:session.current_candle_index]
     
-    return {
+    return candle_response({
         "session_id": session.id,
         "asset": session.asset,
         "timeframe": session.timeframe,
@@ -1866,176 +2123,188 @@ async def get_session_state(session_id: str):
         "total_candles": len(session.candles),
         "orb_range": session.orb_range.model_dump() if session.orb_range else None,
         "active_trade": session.active_trade.model_dump() if session.active_trade else None,
-        "trades_completed": session.trades_completed
-    }
+        "trades_completed": session.trades_completed,
+        "structure": get_structure_tracker(session).events,
+        "seq": session.seq
+    }, negotiate_candle_format(accept))
 
 @api_router.post("/real-market/advance-candle")
-async def advance_candle(session_id: str):
+async def advance_candle(session_id: str, seq: Optional[int] = None, accept: Optional[str] = Header(None)):
     """Advance the market by one candle"""
     session = active_replay_sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if session.current_candle_index >= len(session.candles):
-        return {"message": "No more candles", "finished": True}
-    
-    session.current_candle_index += 1
-    
-    # Check if active trade hit stop or take profit
-    trade_closed = None
-    if session.active_trade:
-        current_candle = session.candles[session.current_candle_index - 1]
-        trade = session.active_trade
+    if session and session.current_candle_index >= len(session.candles):
+        return {"message": "No more candles", "finished": True, "seq": session.seq}
+    
+    async with replay_session_command(session_id, seq) as command:
+        session = command.session
+        if session.current_candle_index >= len(session.candles):
+            command.unchanged()
+            return {"message": "No more candles", "finished": True, "seq": session.seq}
         
-        if trade.direction == "BUY":
-            # Check stop loss hit
-            if current_candle.low <= trade.stop_loss:
-                trade_closed = {"exit_price": trade.stop_loss, "reason": "stop_loss"}
-            # Check take profit hit
-            elif trade.take_profit and current_candle.high >= trade.take_profit:
-                trade_closed = {"exit_price": trade.take_profit, "reason": "take_profit"}
-        else:  # SELL
-            if current_candle.high >= trade.stop_loss:
-                trade_closed = {"exit_price": trade.stop_loss, "reason": "stop_loss"}
-            elif trade.take_profit and current_candle.low <= trade.take_profit:
-                trade_closed = {"exit_price": trade.take_profit, "reason": "take_profit"}
-    
-    visible_candles = session.candles[:session.current_candle_index]
-    new_candle = session.candles[session.current_candle_index - 1]
+        tracker = get_structure_tracker(session)
+        session.current_candle_index += 1
+        
+        # Check if active trade hit stop or take profit
+        trade_closed = None
+        if session.active_trade:
+            current_candle = session.candles[session.current_candle_index - 1]
+            trade = session.active_trade
+            
+            if trade.direction == "BUY":
+                # Check stop loss hit
+                if current_candle.low <= trade.stop_loss:
+                    trade_closed = {"exit_price": trade.stop_loss, "reason": "stop_loss"}
+                # Check take profit hit
+                elif trade.take_profit and current_candle.high >= trade.take_profit:
+                    trade_closed = {"exit_price": trade.take_profit, "reason": "take_profit"}
+            else:  # SELL
+                if current_candle.high >= trade.stop_loss:
+                    trade_closed = {"exit_price": trade.stop_loss, "reason": "stop_loss"}
+                elif trade.take_profit and current_candle.low <= trade.take_profit:
+                    trade_closed = {"exit_price": trade.take_profit, "reason": "take_profit"}
+        
+        new_candle = session.candles[session.current_candle_index - 1]
+        structure_events = tracker.extend([new_candle])
+        
+        payload = {
+            "new_candle": new_candle.model_dump(),
+            "structure_events": structure_events,
+            "current_index": session.current_candle_index,
+            "total_candles": len(session.candles),
+            "trade_closed": trade_closed,
+            "finished": session.current_candle_index >= len(session.candles),
+            "seq": session.seq
+        }
     
-    return {
-        "new_candle": new_candle.model_dump(),
-        "current_index": session.current_candle_index,
-        "total_candles": len(session.candles),
-        "trade_closed": trade_closed,
-        "finished": session.current_candle_index >= len(session.candles)
-    }
+    return candle_response(payload, negotiate_candle_format(accept))
 
 @api_router.post("/real-market/mark-orb")
 async def mark_orb_range(data: MarkORBRequest):
     """Mark the Opening Range Breakout high and low"""
-    session = active_replay_sessions.get(data.session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session.orb_range = ORBRange(
-        high=data.high,
-        low=data.low,
-        marked_at_candle=session.current_candle_index
-    )
-    
-    return {
-        "message": "ORB range marked",
-        "orb_range": session.orb_range.model_dump()
-    }
+    async with replay_session_command(data.session_id, data.seq) as command:
+        session = command.session
+        session.orb_range = ORBRange(
+            high=data.high,
+            low=data.low,
+            marked_at_candle=session.current_candle_index
+        )
+        
+        return {
+            "message": "ORB range marked",
+            "orb_range": session.orb_range.model_dump(),
+            "seq": session.seq
+        }
 
 @api_router.post("/real-market/enter-trade")
 async def enter_trade(data: EnterTradeRequest):
     """Enter a trade in the replay session"""
-    session = active_replay_sessions.get(data.session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if session.active_trade:
-        raise HTTPException(status_code=400, detail="Already have an active trade")
-    
-    if not session.orb_range:
-        raise HTTPException(status_code=400, detail="Must mark ORB range before entering trade")
-    
-    # Validate entry
-    violations = []
-    if not data.stop_loss:
-        violations.append("no_stop_loss")
-    
-    trade = TradeEntry(
-        entry_price=data.entry_price,
-        direction=data.direction,
-        stop_loss=data.stop_loss,
-        take_profit=data.take_profit,
-        entry_candle=session.current_candle_index,
-        orb_high=session.orb_range.high,
-        orb_low=session.orb_range.low
-    )
-    
-    # Check ORB rule violations
-    entry_violations = validate_entry(trade, session.orb_range)
-    violations.extend(entry_violations)
-    
-    session.active_trade = trade
-    
-    rr = calculate_risk_reward(
-        data.entry_price, 
-        data.stop_loss, 
-        data.take_profit, 
-        data.direction
-    )
-    
-    return {
-        "message": "Trade entered",
-        "trade": trade.model_dump(),
-        "risk_reward": rr,
-        "violations": violations,
-        "has_violations": len(violations) > 0
-    }
+    async with replay_session_command(data.session_id, data.seq) as command:
+        session = command.session
+        if session.active_trade:
+            raise HTTPException(status_code=400, detail="Already have an active trade")
+        
+        if not session.orb_range:
+            raise HTTPException(status_code=400, detail="Must mark ORB range before entering trade")
+        
+        # Validate entry
+        violations = []
+        if not data.stop_loss:
+            violations.append("no_stop_loss")
+        
+        trade = TradeEntry(
+            entry_price=data.entry_price,
+            direction=data.direction,
+            stop_loss=data.stop_loss,
+            take_profit=data.take_profit,
+            entry_candle=session.current_candle_index,
+            orb_high=session.orb_range.high,
+            orb_low=session.orb_range.low
+        )
+        
+        # Check ORB rule violations
+        entry_violations = validate_entry(trade, session.orb_range)
+        violations.extend(entry_violations)
+        
+        session.active_trade = trade
+        
+        rr = calculate_risk_reward(
+            data.entry_price, 
+            data.stop_loss, 
+            data.take_profit, 
+            data.direction
+        )
+        
+        return {
+            "message": "Trade entered",
+            "trade": trade.model_dump(),
+            "risk_reward": rr,
+            "violations": violations,
+            "has_violations": len(violations) > 0,
+            "seq": session.seq
+        }
 
 @api_router.post("/real-market/close-trade")
 async def close_trade(data: CompleteTradeRequest):
     """Close a trade and record the evaluation"""
-    session = active_replay_sessions.get(data.session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if not session.active_trade:
-        raise HTTPException(status_code=400, detail="No active trade to close")
-    
-    trade = session.active_trade
-    
-    # Calculate result
-    rr = calculate_risk_reward(trade.entry_price, trade.stop_loss, trade.take_profit, trade.direction)
-    result_r = calculate_result_in_r(trade.entry_price, data.exit_price, trade.stop_loss, trade.direction)
-    
-    # Create trade result
-    trade_result = TradeResult(
-        user_id=session.user_id,
-        session_id=session.id,
-        asset=session.asset,
-        date=datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        timeframe=session.timeframe,
-        orb_high=trade.orb_high,
-        orb_low=trade.orb_low,
-        entry_price=trade.entry_price,
-        direction=trade.direction,
-        stop_loss=trade.stop_loss,
-        take_profit=trade.take_profit,
-        exit_price=data.exit_price,
-        risk_reward=rr,
-        result_in_r=result_r,
-        emotion_before=data.emotion_before,
-        emotion_after=data.emotion_after,
-        rule_violation=data.rule_violation,
-        violation_types=data.violation_types
-    )
-    
-    # Store in database
-    try:
-        supabase.table('real_market_trades').insert(trade_result.model_dump()).execute()
-    except Exception as e:
-        logger.warning(f"Could not save trade to database: {e}")
-    
-    # Update session
-    session.active_trade = None
-    session.trades_completed += 1
-    if data.rule_violation:
-        session.rule_violations += 1
-    
-    return {
-        "message": "Trade closed and recorded",
-        "trade_result": trade_result.model_dump(),
-        "session_stats": {
-            "trades_completed": session.trades_completed,
-            "rule_violations": session.rule_violations
+    async with replay_session_command(data.session_id, data.seq) as command:
+        session = command.session
+        if not session.active_trade:
+            raise HTTPException(status_code=400, detail="No active trade to close")
+        
+        trade = session.active_trade
+        
+        # Calculate result
+        rr = calculate_risk_reward(trade.entry_price, trade.stop_loss, trade.take_profit, trade.direction)
+        result_r = calculate_result_in_r(trade.entry_price, data.exit_price, trade.stop_loss, trade.direction)
+        
+        # Create trade result
+        trade_result = TradeResult(
+            user_id=session.user_id,
+            session_id=session.id,
+            asset=session.asset,
+            date=datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            timeframe=session.timeframe,
+            orb_high=trade.orb_high,
+            orb_low=trade.orb_low,
+            entry_price=trade.entry_price,
+            direction=trade.direction,
+            stop_loss=trade.stop_loss,
+            take_profit=trade.take_profit,
+            exit_price=data.exit_price,
+            risk_reward=rr,
+            result_in_r=result_r,
+            emotion_before=data.emotion_before,
+            emotion_after=data.emotion_after,
+            rule_violation=data.rule_violation,
+            violation_types=data.violation_types
+        )
+        
+        # Store in database
+        try:
+            supabase.table('real_market_trades').insert(trade_result.model_dump()).execute()
+        except Exception as e:
+            logger.warning(f"Could not save trade to database: {e}")
+        
+        # Update session
+        session.active_trade = None
+        session.trades_completed += 1
+        if data.rule_violation:
+            session.rule_violations += 1
+        
+        return {
+            "message": "Trade closed and recorded",
+            "trade_result": trade_result.model_dump(),
+            "session_stats": {
+                "trades_completed": session.trades_completed,
+                "rule_violations": session.rule_violations
+            },
+            "seq": session.seq
         }
-    }
+
+@api_router.get("/real-market/pool-stats")
+async def get_candle_pool_stats():
+    """Hit rate and refill latency of the pre-generated candle pool"""
+    return candle_pool.stats()
 
 @api_router.get("/real-market/history/{user_id}")
 async def get_trade_history(user_id: str, limit: int = 50):
@@ -2076,6 +2345,8 @@ async def end_session(session_id: str):
     """End and cleanup a replay session"""
     if session_id in active_replay_sessions:
         del active_replay_sessions[session_id]
+    replay_session_locks.pop(session_id, None)
+    replay_structure_trackers.pop(session_id, None)
     return {"message": "Session ended"}
 
 
@@ -2107,7 +2378,7 @@ async def seed_test_user():
     test_user = User(
         username="demo",
         email="demo@tradelingo.com",
-        password_hash=hash_password("demo1234"),
+        password_hash=await password_hasher.hash("demo1234"),
         is_verified=True,  # Pre-verified for demo
         is_admin=False
     )
@@ -2127,6 +2398,7 @@ async def seed_test_user():
     }
     
     supabase.table('users').insert(user_dict).execute()
+    leaderboards.add_user(user_dict)
     
     return {
         "message": "Test user created successfully",
@@ -2146,7 +2418,7 @@ async def seed_super_admin():
     if existing.data:
         # Update existing user to be super admin with pro subscription
         supabase.table('users').update({
-            'password_hash': hash_password(admin_password),
+            'password_hash': await password_hasher.hash(admin_password),
             'is_admin': True,
             'is_verified': True,
             'subscription': 'pro'
@@ -2163,7 +2435,7 @@ async def seed_super_admin():
     admin_user = User(
         username="Ricardo_Admin",
         email=admin_email,
-        password_hash=hash_password(admin_password),
+        password_hash=await password_hasher.hash(admin_password),
         is_verified=True,
         is_admin=True,
         subscription="pro"  # Pro subscription for full access
@@ -2243,7 +2515,7 @@ async def admin_login(login_data: AdminLogin):
     if result.data:
         user = result.data[0]
         if user.get('is_admin', False):
-            if verify_password(login_data.password, user['password_hash']):
+            if await password_hasher.verify(login_data.password, user['password_hash']):
                 return {
                     "success": True,
                     "admin": True,
@@ -2356,6 +2628,8 @@ async def make_user_admin(user_id: str):
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
+    progress_cache.invalidate(user_id)
+    leaderboards.remove_user(user_id)
     return {"message": "User is now an admin"}
 
 @api_router.delete("/admin/users/{user_id}")
@@ -2370,11 +2644,23 @@ async def delete_user(user_id: str):
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
+    progress_cache.invalidate(user_id)
+    leaderboards.remove_user(user_id)
     return {"message": "User deleted successfully"}
 
 # ==================== INTERACTIVE CHART EXERCISES ====================
 
-from interactive_exercises import get_interactive_exercises, validate_click_answer
+from content import (
+    get_interactive_exercises,
+    find_interactive_exercise,
+    interactive_config_version,
+    pack_scenarios,
+    unpack_scenarios,
+    validate_click_answer,
+    validate_click_answers
+)
+
+MAX_BATCH_ANSWERS = 200
 
 class InteractiveAnswerSubmit(BaseModel):
     user_id: str
@@ -2383,16 +2669,28 @@ class InteractiveAnswerSubmit(BaseModel):
     clicked_time: Optional[str] = None
     zone_high: Optional[float] = None  # For FVG drawing
     zone_low: Optional[float] = None   # For FVG drawing
+    seed: Optional[int] = None  # From the exercise; lets the server regenerate instead of reading the cache
+    config_version: Optional[str] = None
+
+class InteractiveBatchSubmit(BaseModel):
+    user_id: str
+    answers: List[InteractiveAnswerSubmit] = Field(..., min_length=1, max_length=MAX_BATCH_ANSWERS)
 
 @api_router.get("/interactive/exercises/{category_id}/level/{level}")
-async def get_interactive_level_exercises(category_id: str, level: int, user_id: Optional[str] = None, refresh: bool = False):
-    """Get interactive chart exercises for a category and level"""
+async def get_interactive_level_exercises(category_id: str, level: int, user_id: Optional[str] = None, refresh: bool = False, compact: bool = False, accept: Optional[str] = Header(None)):
+    """Get interactive chart exercises for a category and level.
+
+    compact=true returns {"scenarios": {id: {"candles"}}, "exercises": [...]}: each
+    distinct chart once, referenced from the exercises by scenario_id. When no
+    chart repeats the plain list is returned, as without compact.
+    """
     if level < 1 or level > 10:
         raise HTTPException(status_code=400, detail="Level must be between 1 and 10")
     
     # Check cache first (unless refresh=True)
     cache_key = f"interactive-{category_id}-level-{level}"
     
+    cached_result = None
     if not refresh:
         cached_result = supabase.table('interactive_exercise_cache').select('*').eq('cache_key', cache_key).execute()
         if cached_result.data and cached_result.data[0].get("exercises"):
@@ -2401,23 +2699,21 @@ async def get_interactive_level_exercises(category_id: str, level: int, user_id:
             refresh = True  # Force generate if not cached
     
     if refresh:
-        # Generate fresh exercises
-        exercises = get_interactive_exercises(category_id, level)
-        
-        # Cache them
-        cache_data = {
-            "cache_key": cache_key,
-            "category_id": category_id,
-            "level": level,
-            "exercises": exercises,
-            "generated_at": datetime.now(timezone.utc).isoformat()
-        }
-        # Upsert
-        existing = supabase.table('interactive_exercise_cache').select('cache_key').eq('cache_key', cache_key).execute()
-        if existing.data:
-            supabase.table('interactive_exercise_cache').update(cache_data).eq('cache_key', cache_key).execute()
+        # The cache stores the packed form when charts repeat: each distinct chart once
+        async def generate():
+            return pack_scenarios(get_interactive_exercises(category_id, level))
+
+        if cached_result is None:
+            # Explicit refresh: a new seed gives a new set, which replaces the cached one
+            async def regenerate():
+                exercises = pack_scenarios(get_interactive_exercises(category_id, level, secrets.randbelow(2**31)))
+                save_exercise_cache(cache_key, category_id, level, exercises)
+                return exercises
+            exercises = await exercise_flights.do(cache_key, regenerate)
         else:
-            supabase.table('interactive_exercise_cache').insert(cache_data).execute()
+            exercises = await generate_exercises_once(cache_key, category_id, level, generate)
+    
+    exercises = unpack_scenarios(exercises)
     
     # Add user progress if user_id provided
     if user_id:
@@ -2426,10 +2722,10 @@ async def get_interactive_level_exercises(category_id: str, level: int, user_id:
         if progress_result.data:
             completed_count = progress_result.data[0].get('exercises_completed', 0)
         
-        for i, ex in enumerate(exercises):
-            ex["is_completed"] = i < completed_count
+        # Copy: a single-flight result is shared with every concurrent waiter
+        exercises = [{**ex, "is_completed": i < completed_count} for i, ex in enumerate(exercises)]
     
-    return exercises
+    return candle_response(pack_scenarios(exercises) if compact else exercises, negotiate_candle_format(accept))
 
 @api_router.delete("/interactive/exercises/cache")
 async def clear_interactive_cache():
@@ -2437,30 +2733,54 @@ async def clear_interactive_cache():
     supabase.table('interactive_exercise_cache').delete().neq('cache_key', '').execute()
     return {"message": "Cache cleared. Exercises will regenerate with latest config."}
 
-@api_router.post("/interactive/exercises/submit")
-async def submit_interactive_answer(data: InteractiveAnswerSubmit):
-    """Submit an answer for an interactive exercise"""
-    import re
-    
-    # Parse exercise ID - format: category_id-L{level}-E{num}
-    match = re.match(r'^(.+)-L(\d+)-E(\d+)$', data.exercise_id)
+def parse_interactive_exercise_id(exercise_id: str):
+    """Exercise ID format: category_id-L{level}-E{num} -> (category_id, level)"""
+    match = re.match(r'^(.+)-L(\d+)-E(\d+)$', exercise_id)
     if not match:
-        raise HTTPException(status_code=400, detail=f"Invalid exercise ID format: {data.exercise_id}")
-    
-    category_id = match.group(1)
-    level = int(match.group(2))
-    
-    # Get the exercise from cache
-    cache_key = f"interactive-{category_id}-level-{level}"
-    cached_result = supabase.table('interactive_exercise_cache').select('*').eq('cache_key', cache_key).execute()
-    
-    if not cached_result.data:
-        raise HTTPException(status_code=404, detail="Exercise not found")
+        raise HTTPException(status_code=400, detail=f"Invalid exercise ID format: {exercise_id}")
+    return match.group(1), int(match.group(2))
+
+def resolve_interactive_exercise(data: InteractiveAnswerSubmit, category_id: str, level: int, cached_sets: Optional[dict] = None) -> dict:
+    """The exercise an answer refers to; cached_sets memoizes cache rows across a batch"""
+    # Exercises are a pure function of (category, level, seed, config version), so a
+    # known seed is graded by regenerating; the cache only holds the seed of a refreshed
+    # set and exercises generated under an older config
+    current_version = data.config_version in (None, interactive_config_version())
+    exercise = None
+    if data.seed is not None and current_version:
+        exercise = find_interactive_exercise(data.exercise_id, category_id, level, data.seed)
+    
+    if exercise is None:
+        cache_key = f"interactive-{category_id}-level-{level}"
+        if cached_sets is not None and cache_key in cached_sets:
+            cached_exercises = cached_sets[cache_key]
+        else:
+            cached_result = supabase.table('interactive_exercise_cache').select('*').eq('cache_key', cache_key).execute()
+            cached_exercises = unpack_scenarios(cached_result.data[0].get("exercises") or []) if cached_result.data else None
+            if cached_sets is not None:
+                cached_sets[cache_key] = cached_exercises
+        if cached_exercises:
+            exercise = next((e for e in cached_exercises if e["id"] == data.exercise_id), None)
+        elif current_version:
+            exercise = find_interactive_exercise(data.exercise_id, category_id, level)
+        else:
+            raise HTTPException(status_code=409, detail="Exercise set is outdated, reload the level")
     
-    cached = cached_result.data[0]
-    exercise = next((e for e in cached["exercises"] if e["id"] == data.exercise_id), None)
     if not exercise:
-        raise HTTPException(status_code=404, detail="Exercise not found")
+        raise HTTPException(status_code=404, detail=f"Exercise not found: {data.exercise_id}")
+    return exercise
+
+@api_router.post("/interactive/exercises/submit")
+async def submit_interactive_answer(data: InteractiveAnswerSubmit, response: Response, idempotency_key: Optional[str] = Header(None)):
+    """Submit an answer for an interactive exercise"""
+    return await idempotent_requests.run(
+        idempotency_key, ["interactive-submit", data.model_dump()],
+        lambda: record_interactive_answer(data), response
+    )
+
+async def record_interactive_answer(data: InteractiveAnswerSubmit):
+    category_id, level = parse_interactive_exercise_id(data.exercise_id)
+    exercise = resolve_interactive_exercise(data, category_id, level)
     
     # Validate the answer
     result = validate_click_answer(
@@ -2520,13 +2840,19 @@ async def submit_interactive_answer(data: InteractiveAnswerSubmit):
         # Update user XP
         new_xp = user['xp'] + xp_gained
         new_level = (new_xp // 100) + 1
+        weekly = weekly_xp_fields(user, xp_gained)
         supabase.table('users').update({
             'xp': new_xp,
-            'level': new_level
+            'level': new_level,
+            **weekly
         }).eq('id', data.user_id).execute()
+        leaderboards.award(user, new_xp, weekly['weekly_xp'], {category_id: xp_gained})
         
         user['xp'] = new_xp
         user['level'] = new_level
+        progress_cache.invalidate(data.user_id)
+    
+    review_scheduler.record_safely(data.user_id, [(data.exercise_id, answer_quality(result["is_correct"], result["accuracy"]))])
     
     return {
         **result,
@@ -2535,6 +2861,127 @@ async def submit_interactive_answer(data: InteractiveAnswerSubmit):
         "rank": calculate_rank(user['xp'])
     }
 
+@api_router.post("/interactive/exercises/submit/batch")
+async def submit_interactive_answers_batch(data: InteractiveBatchSubmit):
+    """Submit many answers at once (e.g. queued offline).
+
+    Answers are graded together and all progress and XP changes are applied in
+    one pass: one progress read, at most one upsert and one insert, and one user update.
+    """
+    if any(answer.user_id != data.user_id for answer in data.answers):
+        raise HTTPException(status_code=400, detail="All answers must belong to the batch user")
+    
+    user_result = supabase.table('users').select('*').eq('id', data.user_id).execute()
+    if not user_result.data:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = user_result.data[0]
+    
+    cached_sets = {}
+    targets = []
+    exercises = []
+    for answer in data.answers:
+        category_id, level = parse_interactive_exercise_id(answer.exercise_id)
+        targets.append((category_id, level))
+        exercises.append(resolve_interactive_exercise(answer, category_id, level, cached_sets))
+    
+    results = validate_click_answers(
+        exercises,
+        [answer.clicked_price for answer in data.answers],
+        [answer.zone_high for answer in data.answers],
+        [answer.zone_low for answer in data.answers]
+    )
+    
+    # Replay the single-submit progress rules in memory: bump the row for this
+    # level, else move the category's row to this level, else start a new row
+    progress_rows = supabase.table('user_progress').select('*').eq('user_id', data.user_id).execute().data or []
+    changed_rows = {}
+    new_rows = []
+    now = datetime.now(timezone.utc).isoformat()
+    total_xp_gained = 0
+    xp_by_category = {}
+    for result, (category_id, level) in zip(results, targets):
+        xp_gained = 5 + (level * 2) if result["is_correct"] else 0
+        result["xp_gained"] = xp_gained
+        if not xp_gained:
+            continue
+        total_xp_gained += xp_gained
+        xp_by_category[category_id] = xp_by_category.get(category_id, 0) + xp_gained
+        
+        rows = [row for row in progress_rows + new_rows if row['category_id'] == category_id]
+        row = next((r for r in rows if r.get('level') == level), None) or (rows[0] if rows else None)
+        if row is None:
+            new_rows.append({
+                'user_id': data.user_id,
+                'category_id': category_id,
+                'level': level,
+                'exercises_completed': 1,
+                'xp_earned': xp_gained,
+                'created_at': now
+            })
+            continue
+        row['level'] = level
+        row['exercises_completed'] = row.get('exercises_completed', 0) + 1
+        row['xp_earned'] = row.get('xp_earned', 0) + xp_gained
+        if 'id' in row:
+            row['updated_at'] = now
+            changed_rows[row['id']] = row
+    
+    if changed_rows:
+        supabase.table('user_progress').upsert(list(changed_rows.values())).execute()
+    if new_rows:
+        supabase.table('user_progress').insert(new_rows).execute()
+    if total_xp_gained:
+        new_xp = user['xp'] + total_xp_gained
+        new_level = (new_xp // 100) + 1
+        weekly = weekly_xp_fields(user, total_xp_gained)
+        supabase.table('users').update({
+            'xp': new_xp,
+            'level': new_level,
+            **weekly
+        }).eq('id', data.user_id).execute()
+        leaderboards.award(user, new_xp, weekly['weekly_xp'], xp_by_category)
+        user['xp'] = new_xp
+        user['level'] = new_level
+    
+    progress_cache.invalidate(data.user_id)
+    review_scheduler.record_safely(data.user_id, [
+        (answer.exercise_id, answer_quality(result["is_correct"], result["accuracy"]))
+        for answer, result in zip(data.answers, results)
+    ])
+    
+    return {
+        "results": results,
+        "correct": sum(1 for result in results if result["is_correct"]),
+        "total": len(results),
+        "xp_gained": total_xp_gained,
+        "total_xp": user['xp'],
+        "rank": calculate_rank(user['xp'])
+    }
+
+@api_router.get("/review/next/{user_id}")
+async def get_next_reviews(user_id: str, limit: int = 10):
+    """Next exercises due for spaced-repetition review, most overdue first"""
+    limit = max(1, min(limit, 50))
+    return review_scheduler.next_batch(user_id, limit)
+
+def require_leaderboards():
+    """Incomplete boards would rank users wrongly, so answer 503 until the startup load succeeds"""
+    if not leaderboards.loaded:
+        raise HTTPException(status_code=503, detail="Leaderboards are still loading", headers={"Retry-After": "5"})
+
+@api_router.get("/leaderboard/{board}")
+async def get_leaderboard(board: str, limit: int = 10):
+    """Top users on the global, weekly or a category's XP leaderboard"""
+    require_leaderboards()
+    limit = max(1, min(limit, 100))
+    return leaderboards.top(board, limit)
+
+@api_router.get("/leaderboard/{board}/rank/{user_id}")
+async def get_leaderboard_rank(board: str, user_id: str):
+    """A user's rank and XP on one leaderboard (rank is null when not ranked)"""
+    require_leaderboards()
+    return leaderboards.standing(board, user_id)
+
 @api_router.get("/interactive/progress/{user_id}")
 async def get_interactive_progress(user_id: str):
     """Get user's interactive exercise progress"""
@@ -2565,7 +3012,8 @@ async def get_interactive_progress(user_id: str):
 app.include_router(api_router)
 
 # Mount static files AFTER router so images are served at /api/static/images/
-app.mount("/api/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# Precompressed .br/.gz siblings come from: python compression.py build
+app.mount("/api/static", PrecompressedStaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # Get CORS origins - if not set, allow all origins
 cors_origins_str = os.environ.get('CORS_ORIGINS', '')
@@ -2574,6 +3022,8 @@ if cors_origins_str:
 else:
     cors_origins = ["*"]
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True if cors_origins != ["*"] else False,
@@ -2597,7 +3047,7 @@ async def startup_seed_data():
             test_user = User(
                 username="demo",
                 email="demo@tradelingo.com",
-                password_hash=hash_password("demo1234"),
+                password_hash=await password_hasher.hash("demo1234"),
                 is_verified=True,  # Pre-verified for demo
                 is_admin=False
             )
@@ -2624,8 +3074,30 @@ async def startup_seed_data():
     except Exception as e:
         logger.error(f"Error seeding data: {e}")
 
+@app.on_event("startup")
+async def load_leaderboards():
+    """Build the XP leaderboards from the database in the background, retrying until it succeeds; awards keep them current afterwards"""
+    global leaderboard_loader
+    leaderboard_loader = asyncio.create_task(leaderboards.load(supabase))
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start in-process background workers"""
+    candle_pool.start()
+    exercise_jobs.start()
+    if os.environ.get('PREGENERATE_EXERCISES', 'true').lower() == 'true':
+        try:
+            enqueue_missing_exercise_levels()
+        except Exception as e:
+            logger.error(f"Error queueing exercise pre-generation: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await candle_pool.stop()
+    await exercise_jobs.stop()
+    if leaderboard_loader is not None:
+        leaderboard_loader.cancel()
+    password_hasher.shutdown()
     # Supabase client doesn't need explicit close
     logger.info("Shutting down TradeLingo API")
 
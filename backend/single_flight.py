@@ -0,0 +1,147 @@
+"""
+Single-Flight Generation
+Makes sure an expensive cache entry is generated once per key: concurrent
+callers in this process share one in-flight task, and other workers are kept
+out by a lease held on the cache row itself.
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """In-process deduplication: one running call per key, shared by all waiters"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        future = self._calls.get(key)
+        if future is not None:
+            # shield: a waiter going away must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+def is_unique_violation(error: Exception) -> bool:
+    """Whether a PostgREST insert failed on a unique constraint (Postgres 23505)"""
+    return getattr(error, 'code', None) == '23505'
+
+
+def _parse_timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class CacheRowLease:
+    """Cross-worker generation lock on a row of the exercise cache table.
+
+    Supabase goes through PostgREST, where every call is its own transaction,
+    so a Postgres advisory lock cannot be held for the length of an LLM call.
+    The unique cache_key gives the same guarantee: the worker that inserts the
+    placeholder row (empty exercises) owns the generation, everyone else polls
+    until the row is filled. A placeholder older than the lease is taken over
+    with a compare-and-swap on generated_at, so a crashed worker never wedges
+    a key. A caller that has waited max_wait_seconds generates the exercises
+    itself without caching them; any insert error other than losing the
+    unique-key race is raised.
+    """
+
+    def __init__(self, client, table: str = 'interactive_exercise_cache', lease_seconds: float = 120.0,
+                 poll_seconds: float = 0.5, max_wait_seconds: float = 150.0):
+        self.client = client
+        self.table = table
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    def _select(self, cache_key: str) -> Optional[dict]:
+        result = self.client.table(self.table).select('*').eq('cache_key', cache_key).execute()
+        return result.data[0] if result.data else None
+
+    def _try_acquire(self, cache_key: str, row: dict) -> Tuple[Optional[str], Optional[List[dict]]]:
+        """Returns (lease stamp if acquired, exercises if another worker already finished)"""
+        stamp = datetime.now(timezone.utc).isoformat()
+        existing = self._select(cache_key)
+
+        if existing is None:
+            try:
+                self.client.table(self.table).insert({**row, "cache_key": cache_key, "exercises": [], "generated_at": stamp}).execute()
+                return stamp, None
+            except Exception as e:
+                if not is_unique_violation(e):
+                    raise
+                # Lost the insert race on the unique cache_key
+                return None, None
+
+        if existing.get('exercises'):
+            return None, existing['exercises']
+
+        age = (datetime.now(timezone.utc) - _parse_timestamp(existing['generated_at'])).total_seconds()
+        if age < self.lease_seconds:
+            return None, None
+
+        # Stale lease: only one worker can swap the old generated_at for its own
+        taken = self.client.table(self.table).update({"generated_at": stamp}).eq('cache_key', cache_key).eq('generated_at', existing['generated_at']).execute()
+        if taken.data:
+            logger.warning(f"Took over stale generation lease for {cache_key}")
+            return stamp, None
+        return None, None
+
+    def _release(self, cache_key: str, stamp: str):
+        """Drop our placeholder after a failed generation so the next caller retries"""
+        try:
+            self.client.table(self.table).delete().eq('cache_key', cache_key).eq('generated_at', stamp).execute()
+        except Exception as e:
+            logger.error(f"Could not release generation lease for {cache_key}: {e}")
+
+    async def generate_once(self, cache_key: str, row: dict, generate: Callable[[], Awaitable[List[dict]]]) -> List[dict]:
+        """Return the cached exercises for cache_key, generating them here only if no other worker is"""
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            stamp, ready = self._try_acquire(cache_key, row)
+            if ready:
+                return ready
+            if stamp:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for the generation of {cache_key}, generating without the lease")
+                return await generate()
+            await asyncio.sleep(self.poll_seconds)
+
+        try:
+            exercises = await generate()
+        except BaseException:
+            self._release(cache_key, stamp)
+            raise
+
+        self.client.table(self.table).update({
+            **row,
+            "exercises": exercises,
+            "generated_at": datetime.now(timezone.utc).isoformat()
+        }).eq('cache_key', cache_key).execute()
+        return exercises
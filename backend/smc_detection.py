@@ -0,0 +1,244 @@
+"""
+SMC Structure Detection
+Labels swing points, breaks of structure (BOS), changes of character (CHoCH),
+fair value gaps (FVG) and order blocks (OB) on candle arrays.
+
+Two entry points with identical results:
+- detect_structure(): batch mode over a whole series. Swings, FVGs and order
+  blocks are NumPy masks; breaks come from one pass over the confirmed swings.
+- StructureTracker: incremental mode, one update() per new bar, O(1) work per
+  bar. Used to annotate replay sessions as they advance.
+
+Definitions:
+- swing high/low: high (low) strictly above (below) `width` bars on each side,
+  confirmed `width` bars later
+- BOS/CHoCH: a close beyond the latest unbroken swing; it is a CHoCH when it
+  goes against the current trend, a BOS otherwise
+- FVG: bar i-1 and bar i+1 don't overlap (bullish: low[i+1] > high[i-1])
+- order block: the last opposite-colored candle before a displacement candle
+  whose body is `factor` times the average of the `lookback` bodies before it
+  and which closes beyond the order block candle
+
+The mask functions take arrays whose last axis is time, so they work on a
+single series or a (batch, bars) stack.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SWING_WIDTH = 2
+DISPLACEMENT_FACTOR = 2.0
+DISPLACEMENT_LOOKBACK = 3
+
+BULLISH = "bullish"
+BEARISH = "bearish"
+
+
+# ==================== MASKS ====================
+
+def swing_highs(high: np.ndarray, width: int = SWING_WIDTH) -> np.ndarray:
+    """Bars whose high is strictly above `width` bars on each side"""
+    high = np.asarray(high, dtype=float)
+    n = high.shape[-1]
+    mask = np.zeros(high.shape, dtype=bool)
+    if n <= 2 * width:
+        return mask
+    center = high[..., width:n - width]
+    inner = np.ones(center.shape, dtype=bool)
+    for offset in range(1, width + 1):
+        inner &= center > high[..., width - offset:n - width - offset]
+        inner &= center > high[..., width + offset:n - width + offset]
+    mask[..., width:n - width] = inner
+    return mask
+
+
+def swing_lows(low: np.ndarray, width: int = SWING_WIDTH) -> np.ndarray:
+    return swing_highs(-np.asarray(low, dtype=float), width)
+
+
+def fair_value_gaps(high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(bullish, bearish) masks at the middle bar of each gap"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    bullish = np.zeros(high.shape, dtype=bool)
+    bearish = np.zeros(high.shape, dtype=bool)
+    bullish[..., 1:-1] = low[..., 2:] > high[..., :-2]
+    bearish[..., 1:-1] = high[..., 2:] < low[..., :-2]
+    return bullish, bearish
+
+
+def order_blocks(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 factor: float = DISPLACEMENT_FACTOR, lookback: int = DISPLACEMENT_LOOKBACK) -> Tuple[np.ndarray, np.ndarray]:
+    """(bullish, bearish) masks at the order block candle"""
+    open_, high, low, close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+    n = close.shape[-1]
+    bullish = np.zeros(close.shape, dtype=bool)
+    bearish = np.zeros(close.shape, dtype=bool)
+    if n <= lookback:
+        return bullish, bearish
+
+    body = np.abs(close - open_)
+    # Body sum of the `lookback` bars before each displacement candidate d = lookback..n-1
+    window = np.lib.stride_tricks.sliding_window_view(body, lookback, axis=-1)[..., :-1, :].sum(axis=-1)
+    displacement = body[..., lookback:] >= factor * window / lookback
+
+    ob = slice(lookback - 1, n - 1)  # the candle right before each candidate
+    d = slice(lookback, n)
+    bullish[..., ob] = displacement & (close[..., ob] < open_[..., ob]) & (close[..., d] > open_[..., d]) & (close[..., d] > high[..., ob])
+    bearish[..., ob] = displacement & (close[..., ob] > open_[..., ob]) & (close[..., d] < open_[..., d]) & (close[..., d] < low[..., ob])
+    return bullish, bearish
+
+
+# ==================== EVENTS ====================
+
+def _swing_event(kind: str, index: int, price: float, width: int) -> dict:
+    return {"type": kind, "index": index, "price": price, "confirmed_at": index + width}
+
+
+def _zone_event(kind: str, direction: str, index: int, top: float, bottom: float, confirmed_at: int) -> dict:
+    return {"type": kind, "direction": direction, "index": index, "top": top, "bottom": bottom, "confirmed_at": confirmed_at}
+
+
+class _BreakState:
+    """Latest unbroken swings and the trend they imply"""
+
+    def __init__(self):
+        self.high: Optional[Tuple[int, float]] = None
+        self.low: Optional[Tuple[int, float]] = None
+        self.trend = 0  # 1 bullish, -1 bearish, 0 unknown
+
+    def check(self, index: int, close: float) -> Optional[dict]:
+        if self.high is not None and close > self.high[1]:
+            event = self._break(BULLISH, index, self.high, self.trend == -1)
+            self.high, self.trend = None, 1
+            return event
+        if self.low is not None and close < self.low[1]:
+            event = self._break(BEARISH, index, self.low, self.trend == 1)
+            self.low, self.trend = None, -1
+            return event
+        return None
+
+    @staticmethod
+    def _break(direction: str, index: int, swing: Tuple[int, float], reversal: bool) -> dict:
+        return {
+            "type": "choch" if reversal else "bos",
+            "direction": direction,
+            "index": index,
+            "level": swing[1],
+            "swing_index": swing[0],
+            "confirmed_at": index,
+        }
+
+
+def detect_structure(open_: Sequence[float], high: Sequence[float], low: Sequence[float], close: Sequence[float],
+                     width: int = SWING_WIDTH, factor: float = DISPLACEMENT_FACTOR,
+                     lookback: int = DISPLACEMENT_LOOKBACK) -> List[dict]:
+    """Every structure event in one series, in the order a tracker would emit them"""
+    open_, high, low, close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+    n = len(close)
+    sh, sl = swing_highs(high, width), swing_lows(low, width)
+    bull_fvg, bear_fvg = fair_value_gaps(high, low)
+    bull_ob, bear_ob = order_blocks(open_, high, low, close, factor, lookback)
+
+    # Bucket the mask events by the bar that confirms them
+    swings_at: Dict[int, List[dict]] = {}
+    for i in np.flatnonzero(sh):
+        swings_at.setdefault(i + width, []).append(_swing_event("swing_high", int(i), float(high[i]), width))
+    for i in np.flatnonzero(sl):
+        swings_at.setdefault(i + width, []).append(_swing_event("swing_low", int(i), float(low[i]), width))
+
+    zones_at: Dict[int, List[dict]] = {}
+    for mask, direction in ((bull_fvg, BULLISH), (bear_fvg, BEARISH)):
+        for i in np.flatnonzero(mask):
+            top, bottom = (low[i + 1], high[i - 1]) if direction == BULLISH else (low[i - 1], high[i + 1])
+            zones_at.setdefault(i + 1, []).append(_zone_event("fvg", direction, int(i), float(top), float(bottom), int(i + 1)))
+    for mask, direction in ((bull_ob, BULLISH), (bear_ob, BEARISH)):
+        for i in np.flatnonzero(mask):
+            zones_at.setdefault(i + 1, []).append(_zone_event("order_block", direction, int(i), float(high[i]), float(low[i]), int(i + 1)))
+
+    events = []
+    state = _BreakState()
+    for bar in range(n):
+        for event in sorted(swings_at.get(bar, ()), key=lambda e: e["type"]):
+            events.append(event)
+            if event["type"] == "swing_high":
+                state.high = (event["index"], event["price"])
+            else:
+                state.low = (event["index"], event["price"])
+        brk = state.check(bar, float(close[bar]))
+        if brk:
+            events.append(brk)
+        events.extend(sorted(zones_at.get(bar, ()), key=lambda e: (e["type"], e["direction"])))
+    return events
+
+
+class StructureTracker:
+    """Incremental detection: feed bars one at a time, get the events each one confirms"""
+
+    def __init__(self, width: int = SWING_WIDTH, factor: float = DISPLACEMENT_FACTOR,
+                 lookback: int = DISPLACEMENT_LOOKBACK):
+        self.width = width
+        self.factor = factor
+        self.lookback = lookback
+        self.open: List[float] = []
+        self.high: List[float] = []
+        self.low: List[float] = []
+        self.close: List[float] = []
+        self._state = _BreakState()
+        self.events: List[dict] = []
+
+    def __len__(self):
+        return len(self.close)
+
+    def extend(self, candles) -> List[dict]:
+        """Feed objects or dicts with open/high/low/close"""
+        new_events = []
+        for candle in candles:
+            if isinstance(candle, dict):
+                new_events.extend(self.update(candle["open"], candle["high"], candle["low"], candle["close"]))
+            else:
+                new_events.extend(self.update(candle.open, candle.high, candle.low, candle.close))
+        return new_events
+
+    def update(self, open_: float, high: float, low: float, close: float) -> List[dict]:
+        o, h, l, c = self.open, self.high, self.low, self.close
+        bar = len(c)
+        o.append(float(open_)); h.append(float(high)); l.append(float(low)); c.append(float(close))
+        new_events = []
+
+        # Swing confirmed by this bar
+        w = self.width
+        i = bar - w
+        if i >= w:
+            if all(h[i] > h[i - k] and h[i] > h[i + k] for k in range(1, w + 1)):
+                new_events.append(_swing_event("swing_high", i, h[i], w))
+                self._state.high = (i, h[i])
+            if all(l[i] < l[i - k] and l[i] < l[i + k] for k in range(1, w + 1)):
+                new_events.append(_swing_event("swing_low", i, l[i], w))
+                self._state.low = (i, l[i])
+
+        brk = self._state.check(bar, c[bar])
+        if brk:
+            new_events.append(brk)
+
+        zones = []
+        # FVG around the previous bar
+        if bar >= 2:
+            if l[bar] > h[bar - 2]:
+                zones.append(_zone_event("fvg", BULLISH, bar - 1, l[bar], h[bar - 2], bar))
+            elif h[bar] < l[bar - 2]:
+                zones.append(_zone_event("fvg", BEARISH, bar - 1, l[bar - 2], h[bar], bar))
+
+        # Order block: is this bar a displacement away from the previous one?
+        if bar >= self.lookback:
+            prev = bar - 1
+            body_sum = sum(abs(c[k] - o[k]) for k in range(bar - self.lookback, bar))
+            if abs(c[bar] - o[bar]) >= self.factor * body_sum / self.lookback:
+                if c[prev] < o[prev] and c[bar] > o[bar] and c[bar] > h[prev]:
+                    zones.append(_zone_event("order_block", BULLISH, prev, h[prev], l[prev], bar))
+                elif c[prev] > o[prev] and c[bar] < o[bar] and c[bar] < l[prev]:
+                    zones.append(_zone_event("order_block", BEARISH, prev, h[prev], l[prev], bar))
+
+        new_events.extend(sorted(zones, key=lambda e: (e["type"], e["direction"])))
+        self.events.extend(new_events)
+        return new_events
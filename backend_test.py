@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
 import requests
+import os
 import sys
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import time
 
 class TradeLingoPro_UpgradeTester:
@@ -220,6 +221,145 @@ class TradeLingoPro_UpgradeTester:
         except Exception as e:
             return False, f"Real market endpoint error - {str(e)}"
 
+    def test_review_schedule_progression(self):
+        """Test SM-2 intervals: 1 day, then 6 days, back to 1 day after a wrong answer"""
+        if not self.test_user_id:
+            return False, "No test user available"
+        
+        exercise_id = "candlesticks-L1-E1"
+        today = datetime.now(timezone.utc).date()
+        expected = [(True, 1), (True, 6), (False, 1)]
+        try:
+            for is_correct, interval in expected:
+                response = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json={
+                    "user_id": self.test_user_id,
+                    "exercise_id": exercise_id,
+                    "is_correct": is_correct
+                })
+                if response.status_code != 200:
+                    return False, f"Exercise completion failed (Status: {response.status_code})"
+                
+                schedule = self.session.get(f"{self.api_base}/review/next/{self.test_user_id}").json()
+                due_date = (today + timedelta(days=interval)).isoformat()
+                if schedule.get("tracked") != 1 or schedule.get("next_due_date") != due_date:
+                    return False, f"Expected 1 item due {due_date}, got {schedule}"
+            return True, "Review intervals went 1 -> 6 -> 1 days"
+        except Exception as e:
+            return False, f"Review schedule error - {str(e)}"
+
+    def test_progress_after_completion(self):
+        """Test that a progress read right after an exercise completion reflects it"""
+        if not self.test_user_id:
+            return False, "No test user available"
+        
+        try:
+            before = self.session.get(f"{self.api_base}/progress/{self.test_user_id}")
+            if before.status_code != 200:
+                return False, f"Progress summary failed (Status: {before.status_code})"
+            before = before.json()
+            
+            response = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json={
+                "user_id": self.test_user_id,
+                "exercise_id": "market-structure-L1-E1",
+                "is_correct": True
+            })
+            if response.status_code != 200:
+                return False, f"Exercise completion failed (Status: {response.status_code})"
+            
+            after = self.session.get(f"{self.api_base}/progress/{self.test_user_id}").json()
+            level = after["categories"]["market-structure"]["levels"][0]
+            if after["total_completed"] != before["total_completed"] + 1 or level["completed_exercises"] < 1:
+                return False, f"Progress not updated: {before['total_completed']} -> {after['total_completed']}"
+            return True, f"Progress updated immediately ({after['total_completed']} exercises completed)"
+        except Exception as e:
+            return False, f"Progress summary error - {str(e)}"
+
+    def test_idempotency_key(self):
+        """Test that a retried submission is replayed and a reused key with another body is rejected"""
+        if not self.test_user_id:
+            return False, "No test user available"
+        
+        headers = {"Idempotency-Key": f"backend-test-{self.test_user_id}"}
+        body = {"user_id": self.test_user_id, "exercise_id": "liquidity-L1-E1", "is_correct": True}
+        try:
+            first = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json=body, headers=headers)
+            retry = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json=body, headers=headers)
+            if first.status_code != 200 or retry.status_code != 200:
+                return False, f"Submissions failed (Status: {first.status_code}, {retry.status_code})"
+            if retry.headers.get("Idempotent-Replayed") != "true" or retry.json() != first.json():
+                return False, f"Retry was not replayed: {retry.headers.get('Idempotent-Replayed')}, {retry.json()}"
+            if "Idempotent-Replayed" in first.headers:
+                return False, "First submission was marked as a replay"
+            
+            conflict = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json={**body, "is_correct": False}, headers=headers)
+            if conflict.status_code != 422:
+                return False, f"Reused key with a different body was not rejected (Status: {conflict.status_code})"
+            return True, f"Retry replayed (total_xp {retry.json().get('total_xp')} unchanged), conflicting reuse rejected"
+        except Exception as e:
+            return False, f"Idempotency error - {str(e)}"
+
+    def test_leaderboard_tie_ranks(self):
+        """Test that two users with the same XP share a leaderboard rank"""
+        try:
+            user_ids = []
+            for n in range(2):
+                name = f"tie_{int(time.time() * 1000)}_{n}"
+                response = self.session.post(f"{self.api_base}/auth/register", json={
+                    "email": f"{name}@test.com",
+                    "password": "TestPass123!",
+                    "username": name
+                })
+                if response.status_code not in (200, 201):
+                    return False, f"Registration failed (Status: {response.status_code})"
+                user_ids.append(response.json()["id"])
+                response = self.session.post(f"{self.api_base}/curriculum/exercises/complete", json={
+                    "user_id": user_ids[-1],
+                    "exercise_id": "fvg-L1-E1",
+                    "is_correct": True
+                })
+                if response.status_code != 200:
+                    return False, f"Exercise completion failed (Status: {response.status_code})"
+            
+            ranks = {}
+            for board in ("global", "weekly", "fvg"):
+                standings = [self.session.get(f"{self.api_base}/leaderboard/{board}/rank/{user_id}").json() for user_id in user_ids]
+                if standings[0]["xp"] != standings[1]["xp"] or standings[0]["rank"] is None or standings[0]["rank"] != standings[1]["rank"]:
+                    return False, f"Tied users ranked differently on {board}: {standings}"
+                ranks[board] = standings[0]["rank"]
+            return True, f"Tied users share their rank on every board: {ranks}"
+        except Exception as e:
+            return False, f"Leaderboard error - {str(e)}"
+    
+    def test_weekly_rollover(self):
+        """Test that the weekly board and weekly XP restart with a new ISO week (in-process, no server needed)"""
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+        import leaderboard
+        
+        original_week = leaderboard.current_week
+        try:
+            leaderboard.current_week = lambda now=None: "2026-W01"
+            boards = leaderboard.Leaderboards()
+            user = {"id": "rollover-user", "username": "rollover", "xp": 0}
+            fields = leaderboard.weekly_xp_fields(user, 20)
+            boards.award(user, 20, fields["weekly_xp"])
+            user.update(xp=20, **fields)
+            
+            leaderboard.current_week = lambda now=None: "2026-W02"
+            standing = boards.standing("weekly", user["id"])
+            if standing["week"] != "2026-W02" or standing["rank"] is not None:
+                return False, f"Weekly board kept last week's XP: {standing}"
+            
+            fields = leaderboard.weekly_xp_fields(user, 5)
+            if fields != {"weekly_xp": 5, "weekly_xp_week": "2026-W02"}:
+                return False, f"Weekly XP did not restart: {fields}"
+            boards.award(user, 25, fields["weekly_xp"])
+            weekly, total = boards.standing("weekly", user["id"]), boards.standing("global", user["id"])
+            if (weekly["xp"], weekly["rank"], total["xp"]) != (5, 1, 25):
+                return False, f"Unexpected standings after rollover: weekly {weekly}, global {total}"
+            return True, "Weekly board restarted at the new ISO week, global XP kept"
+        finally:
+            leaderboard.current_week = original_week
+
 def main():
     """Run all Pro Upgrade tests"""
     print("🚀 TradeLingo Pro Upgrade Backend Testing")
@@ -237,6 +377,11 @@ def main():
         ("Invalid Plan Rejection", tester.test_invalid_subscription_plan),
         ("Curriculum Endpoints", tester.test_curriculum_endpoints),
         ("Real Market Endpoints", tester.test_real_market_endpoints),
+        ("Review Schedule Progression", tester.test_review_schedule_progression),
+        ("Progress After Completion", tester.test_progress_after_completion),
+        ("Idempotency-Key Replay", tester.test_idempotency_key),
+        ("Leaderboard Tie Ranks", tester.test_leaderboard_tie_ranks),
+        ("Weekly Leaderboard Rollover", tester.test_weekly_rollover),
     ]
     
     # Run all tests
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Worker boot benchmark.
+
+Imports server.py in fresh interpreters and reports the import time, the
+peak RSS of the idle process, and which content modules were loaded. Each
+content module is then timed on its own.
+
+Usage:
+    python benchmarks/bench_import.py              # 5 runs per measurement
+    python benchmarks/bench_import.py --runs 10
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+DEFAULT_OUTPUT = BENCH_DIR / "import_results.json"
+
+CONTENT_MODULES = [
+    "lesson_intros",
+    "category_lessons",
+    "curriculum_data",
+    "exercises_config",
+    "interactive_config",
+    "interactive_exercises",
+    "curriculum",
+]
+
+PROBE = """
+import sys, json, time, resource, logging
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = [m for m in {content_modules!r} if m in sys.modules]
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "content_modules_loaded": loaded,
+}}))
+"""
+
+
+def probe(module: str) -> dict:
+    env = {**os.environ, "SUPABASE_SERVICE_KEY": os.environ.get("SUPABASE_SERVICE_KEY", "benchmark")}
+    code = PROBE.format(module=module, content_modules=CONTENT_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(module: str, runs: int) -> dict:
+    probe(module)  # warm the .pyc cache
+    samples = [probe(module) for _ in range(runs)]
+    seconds = [s["seconds"] * 1000 for s in samples]
+    rss = [s["max_rss_kb"] / 1024 for s in samples]
+    return {
+        "import_ms_median": round(statistics.median(seconds), 1),
+        "import_ms_min": round(min(seconds), 1),
+        "max_rss_mb_median": round(statistics.median(rss), 1),
+        "content_modules_loaded": samples[-1]["content_modules_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    results = {"server": measure("server", args.runs)}
+    for module in CONTENT_MODULES:
+        results[module] = measure(module, args.runs)
+
+    width = max(len(name) for name in results)
+    print(f"{'module':<{width}}  {'import':>10}  {'best':>10}  {'peak RSS':>9}  content loaded")
+    for name, stats in results.items():
+        print(
+            f"{name:<{width}}  {stats['import_ms_median']:>8.1f}ms  {stats['import_ms_min']:>8.1f}ms  "
+            f"{stats['max_rss_mb_median']:>7.1f}MB  {', '.join(stats['content_modules_loaded']) or '-'}"
+        )
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
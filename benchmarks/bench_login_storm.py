@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark.
+
+Fires a burst of concurrent /api/auth/login requests at the app and, during
+the burst, measures the latency of a cheap route (/api/curriculum/tiers)
+that shares the event loop. It runs twice: with bcrypt on the password
+hashing pool (what the server does), and with bcrypt called inline on the
+event loop (the previous behavior) for comparison.
+
+Requests go through httpx's ASGI transport in this process, so the probe
+latency shows exactly how long the event loop was blocked. The users table
+is an in-memory stand-in holding one account; no database is needed.
+
+Usage:
+    python benchmarks/bench_login_storm.py
+    python benchmarks/bench_login_storm.py --logins 64 --concurrency 32
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py builds a Supabase client at import; the users table is replaced below
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+os.environ.setdefault("EMAIL_VERIFICATION_ENABLED", "false")
+
+import logging
+logging.disable(logging.INFO)
+
+import httpx
+
+DEFAULT_OUTPUT = BENCH_DIR / "login_storm_results.json"
+PROBE_PATH = "/api/curriculum/tiers"
+EMAIL = "storm@tradelingo.com"
+PASSWORD = "storm-password"
+
+
+class UsersTable:
+    """Answers the login route's single query: select('*').eq('email', ...)"""
+
+    def __init__(self, user: dict):
+        self.user = user
+        self.data = []
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.data = [self.user] if self.user.get(column) == value else []
+        return self
+
+    def execute(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self, user: dict):
+        self.user = user
+
+    def table(self, name):
+        return UsersTable(self.user)
+
+
+class InlineHasher:
+    """bcrypt on the event loop, as before the worker pool"""
+
+    async def verify(self, password, password_hash):
+        from password_hashing import verify_password
+        return verify_password(password, password_hash)
+
+
+def percentiles(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def probe_until(client: httpx.AsyncClient, done: asyncio.Event, interval: float) -> list:
+    """Latency of each probe measured from when it was due, so time spent
+    waiting for a blocked event loop counts too"""
+    samples = []
+    due = time.perf_counter()
+    while True:
+        response = await client.get(PROBE_PATH)
+        response.raise_for_status()
+        finished = time.perf_counter()
+        samples.append((finished - due) * 1000)
+        if done.is_set():
+            return samples
+        due = finished + interval
+        await asyncio.sleep(interval)
+
+
+async def run_storm(app, logins: int, concurrency: int, interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Idle latency first, as the reference point
+        idle = asyncio.Event()
+        idle_probe = asyncio.create_task(probe_until(client, idle, interval))
+        await asyncio.sleep(0.5)
+        idle.set()
+        idle_samples = await idle_probe
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with limit:
+                response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                response.raise_for_status()
+
+        done = asyncio.Event()
+        probe = asyncio.create_task(probe_until(client, done, interval))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        storm_samples = await probe
+
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "storm_seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 2),
+        "probe_idle": percentiles(idle_samples),
+        "probe_during_storm": percentiles(storm_samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between probe requests")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    import server
+    from password_hashing import hash_password
+
+    server.supabase = FakeClient({
+        "id": "storm-user",
+        "username": "storm",
+        "email": EMAIL,
+        "password_hash": hash_password(PASSWORD),
+        "xp": 0,
+        "level": 1,
+        "completed_lessons": [],
+        "subscription": "free",
+        "is_verified": True,
+        "is_admin": False,
+    })
+
+    results = {}
+    pool = server.password_hasher
+    results["pool"] = asyncio.run(run_storm(server.app, args.logins, args.concurrency, args.interval))
+    results["pool"]["hasher"] = pool.stats()
+    server.password_hasher = InlineHasher()
+    try:
+        results["inline"] = asyncio.run(run_storm(server.app, args.logins, args.concurrency, args.interval))
+    finally:
+        server.password_hasher = pool
+
+    for mode, result in results.items():
+        idle, storm = result["probe_idle"], result["probe_during_storm"]
+        print(f"{mode:<7} {result['logins_per_second']:>7.1f} logins/s   "
+              f"probe p50 {idle['p50_ms']:.1f}ms idle -> {storm['p50_ms']:.1f}ms storm   "
+              f"p95 {storm['p95_ms']:.1f}ms   max {storm['max_ms']:.1f}ms   ({storm['count']} probes)")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
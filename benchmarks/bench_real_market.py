@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Real Market benchmark suite.
+
+Times the replay hot path (candle generation, session start, advance-candle)
+and the discipline analytics at several sizes, writes the results as JSON and
+compares them against benchmarks/baseline.json.
+
+Usage:
+    python benchmarks/bench_real_market.py                    # run + compare
+    python benchmarks/bench_real_market.py --update-baseline  # run + store as baseline
+    python benchmarks/bench_real_market.py --threshold 0.5    # allow 50% slowdown
+
+Exits with status 1 when any benchmark is slower than baseline * (1 + threshold).
+"""
+import gc
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py builds a Supabase client at import; the replay routes never touch it
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+import logging
+logging.disable(logging.INFO)
+
+from real_market import (
+    generate_realistic_candles, validate_entry, calculate_discipline_score,
+    generate_insights, ORBRange, TradeEntry, TradeResult, ReplaySession
+)
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results.json"
+
+CANDLE_SIZES = [100, 1000, 10000]
+TRADE_SIZES = [10, 100, 1000]
+ENTRY_BATCH_SIZES = [100, 10000]
+
+
+def measure(func, min_time: float = 0.3, repeats: int = 7) -> dict:
+    """Time func; returns per-call stats in microseconds"""
+    func()  # warm up
+
+    # Pick a loop count so one repeat takes roughly min_time / repeats
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeats or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    # Like timeit, keep the collector from landing in random samples
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples.append((time.perf_counter() - started) / loops * 1e6)
+    finally:
+        gc.enable()
+
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(min(samples), 3),
+        "max_us": round(max(samples), 3),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def make_trades(count: int, rng: random.Random) -> list:
+    emotions = ["neutral", "confident", "anxious", "frustrated"]
+    violations = ["moved_stop", "no_stop_loss", "entry_outside_plan", "overtrading", "fomo"]
+    trades = []
+    for i in range(count):
+        has_violation = rng.random() < 0.3
+        trades.append(TradeResult(
+            user_id="bench-user",
+            session_id=f"bench-session-{i}",
+            asset="EURUSD",
+            date="2024-01-01",
+            timeframe="15m",
+            orb_high=1.09,
+            orb_low=1.08,
+            entry_price=1.091,
+            direction=rng.choice(["BUY", "SELL"]),
+            stop_loss=rng.choice([0.0, 1.085]),
+            take_profit=1.1,
+            exit_price=rng.uniform(1.08, 1.1),
+            risk_reward=2.0,
+            result_in_r=rng.uniform(-1, 2),
+            emotion_before=rng.choice(emotions),
+            emotion_after=rng.choice(emotions),
+            rule_violation=has_violation,
+            violation_types=[rng.choice(violations)] if has_violation else [],
+        ))
+    return trades
+
+
+def bench_engine(results: dict):
+    rng = random.Random(42)
+    random.seed(42)
+
+    for n in CANDLE_SIZES:
+        results[f"generate_realistic_candles[n={n}]"] = measure(
+            lambda n=n: generate_realistic_candles(n, 1.08, "15m")
+        )
+
+    orb = ORBRange(high=1.09, low=1.08, marked_at_candle=20)
+    for n in ENTRY_BATCH_SIZES:
+        entries = [
+            TradeEntry(
+                entry_price=rng.uniform(1.07, 1.10),
+                direction=rng.choice(["BUY", "SELL"]),
+                stop_loss=rng.choice([0.0, 1.075]),
+                take_profit=None,
+                entry_candle=20,
+                orb_high=orb.high,
+                orb_low=orb.low,
+            )
+            for _ in range(n)
+        ]
+        results[f"validate_entry[batch={n}]"] = measure(
+            lambda entries=entries: [validate_entry(e, orb) for e in entries]
+        )
+
+    for n in TRADE_SIZES:
+        trades = make_trades(n, rng)
+        results[f"calculate_discipline_score[trades={n}]"] = measure(
+            lambda trades=trades: calculate_discipline_score(trades)
+        )
+        results[f"generate_insights[trades={n}]"] = measure(
+            lambda trades=trades: generate_insights(trades)
+        )
+
+
+def bench_endpoints(results: dict):
+    import server
+    from fastapi.testclient import TestClient
+
+    client = TestClient(server.app)
+    start_body = {"user_id": "bench-user", "asset": "EURUSD", "timeframe": "15m"}
+
+    # Pool is not running (no lifespan), so every start generates inline
+    results["endpoint.start_session[pool=miss]"] = measure(
+        lambda: client.post("/api/real-market/start-session", json=start_body)
+    )
+
+    def start_with_pool_hit():
+        server.candle_pool._series[("EURUSD", "15m")].append(
+            (time.monotonic(), pooled_candles)
+        )
+        client.post("/api/real-market/start-session", json=start_body)
+
+    pooled_candles = generate_realistic_candles(100, 1.08, "15m")
+    results["endpoint.start_session[pool=hit]"] = measure(start_with_pool_hit)
+    server.active_replay_sessions.clear()
+
+    for n in CANDLE_SIZES:
+        session = ReplaySession(
+            user_id="bench-user",
+            asset="EURUSD",
+            timeframe="15m",
+            candles=generate_realistic_candles(n, 1.08, "15m"),
+        )
+        server.active_replay_sessions[session.id] = session
+        url = f"/api/real-market/advance-candle?session_id={session.id}"
+
+        def advance(session=session, url=url):
+            # Rewind instead of running off the end of the series
+            if session.current_candle_index >= len(session.candles):
+                session.current_candle_index = 20
+            client.post(url)
+
+        results[f"endpoint.advance_candle[candles={n}]"] = measure(advance)
+        results[f"endpoint.session_state[candles={n}]"] = measure(
+            lambda session=session: client.get(f"/api/real-market/session/{session.id}")
+        )
+        del server.active_replay_sessions[session.id]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print a comparison table and return the names of regressed benchmarks.
+
+    Best-of-N times are compared, as they are far less sensitive to
+    scheduler noise than medians.
+    """
+    regressions = []
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'best':>12}  {'baseline':>12}  {'ratio':>7}")
+    for name, stats in results.items():
+        current = stats["min_us"]
+        base = baseline.get(name, {}).get("min_us")
+        if base:
+            ratio = current / base
+            flag = "  REGRESSION" if ratio > 1 + threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<{width}}  {current:>10.1f}us  {base:>10.1f}us  {ratio:>6.2f}x{flag}")
+        else:
+            print(f"{name:<{width}}  {current:>10.1f}us  {'-':>12}  {'new':>7}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown before failing (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--skip-endpoints", action="store_true", help="only time the real_market functions")
+    args = parser.parse_args()
+
+    results = {}
+    bench_engine(results)
+    if not args.skip_endpoints:
+        bench_endpoints(results)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first")
+        compare(results, {}, args.threshold)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
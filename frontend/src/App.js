@@ -299,15 +299,15 @@ const HomeScreen = ({ user, onCategorySelect, onLegacyLessonSelect, onRealMarket
     try {
       const [tiersRes, progressRes, adsRes] = await Promise.all([
         axios.get(`${API}/curriculum/tiers`),
-        axios.get(`${API}/curriculum/progress/${user.id}`),
+        axios.get(`${API}/progress/${user.id}`),
         axios.get(`${API}/ads/propfirms`)
       ]);
       setTiers(tiersRes.data);
-      setProgress(progressRes.data);
+      setProgress(progressRes.data.categories);
       setAds(adsRes.data);
       
       // Calculate stats from user data
-      const totalProgress = Object.values(progressRes.data).reduce((acc, p) => acc + (p.total_completed || 0), 0);
+      const totalProgress = progressRes.data.total_completed;
       setUserStats({
         accuracy: Math.min(100, Math.max(0, 60 + Math.floor(user.xp / 50))),
         patience: Math.floor(user.xp / 100) + 2,
@@ -333,9 +333,9 @@ const HomeScreen = ({ user, onCategorySelect, onLegacyLessonSelect, onRealMarket
     const catProgress = progress[categoryId];
     if (!catProgress) return { completed: 0, total: 100, percentage: 0 };
     return {
-      completed: catProgress.total_completed || 0,
-      total: 100,
-      percentage: catProgress.completion_percentage || 0
+      completed: catProgress.total_completed,
+      total: catProgress.total_exercises,
+      percentage: (catProgress.total_completed / catProgress.total_exercises) * 100
     };
   };
 
@@ -1080,6 +1080,8 @@ const ExerciseScreen = ({ category, level, user, onBack, onComplete }) => {
 
   const fetchExercises = async () => {
     try {
+      // The /exercises/stream endpoint only pays off with a provider that streams
+      // tokens; the live provider answers in one piece, so the plain endpoint is used
       const response = await axios.get(
         `${API}/curriculum/categories/${category.id}/levels/${level.level}/exercises?user_id=${user.id}`
       );
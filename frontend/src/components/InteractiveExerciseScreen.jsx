@@ -61,9 +61,16 @@ const InteractiveExerciseScreen = ({ category, level, user, onBack, onComplete }
   const fetchExercises = async () => {
     try {
       const response = await axios.get(
-        `${API}/interactive/exercises/${category.id}/level/${level.level}?user_id=${user.id}`
+        `${API}/interactive/exercises/${category.id}/level/${level.level}?user_id=${user.id}&compact=true`
+      );
+      // Compact payload: each chart is sent once and referenced by scenario_id;
+      // a plain list comes back when no chart repeats
+      const { scenarios, exercises: packed } = Array.isArray(response.data)
+        ? { scenarios: {}, exercises: response.data }
+        : response.data;
+      const exerciseList = packed.map(({ scenario_id, ...ex }) =>
+        scenario_id ? { ...ex, candles: scenarios[scenario_id].candles } : ex
       );
-      const exerciseList = response.data;
       const firstIncomplete = exerciseList.findIndex(ex => !ex.is_completed);
       setExercises(exerciseList);
       setCurrentIndex(firstIncomplete >= 0 ? firstIncomplete : 0);
@@ -116,7 +123,9 @@ const InteractiveExerciseScreen = ({ category, level, user, onBack, onComplete }
       const submitData = {
         user_id: user.id,
         exercise_id: currentExercise.id,
-        clicked_time: currentExercise.candles[0]?.time
+        clicked_time: currentExercise.candles[0]?.time,
+        seed: currentExercise.seed,
+        config_version: currentExercise.config_version
       };
 
       if (drawModeType === 'rectangle' && drawnZone) {
@@ -709,7 +709,9 @@ const RealMarketZone = ({ user, onBack }) => {
     if (!session) return;
     
     try {
-      const res = await axios.post(`${API}/real-market/advance-candle?session_id=${session.session_id}`);
+      const res = await axios.post(
+        `${API}/real-market/advance-candle?session_id=${session.session_id}&seq=${session.seq}`
+      );
       
       if (res.data.finished) {
         toast.info('Session complete!');
@@ -720,7 +722,8 @@ const RealMarketZone = ({ user, onBack }) => {
       setSession(prev => ({
         ...prev,
         candles: [...prev.candles, res.data.new_candle],
-        current_index: res.data.current_index
+        current_index: res.data.current_index,
+        seq: res.data.seq
       }));
       
       // Check if trade was closed
@@ -733,6 +736,8 @@ const RealMarketZone = ({ user, onBack }) => {
         setShowEvaluation(true);
       }
     } catch (error) {
+      // 409 means a duplicate click raced ahead of this one - nothing to do
+      if (error.response?.status === 409) return;
       toast.error('Failed to advance candle');
     }
   };
@@ -747,12 +752,14 @@ const RealMarketZone = ({ user, onBack }) => {
       const res = await axios.post(`${API}/real-market/mark-orb`, {
         session_id: session.session_id,
         high: parseFloat(orbHigh),
-        low: parseFloat(orbLow)
+        low: parseFloat(orbLow),
+        seq: session.seq
       });
       
       setSession(prev => ({
         ...prev,
-        orb_range: res.data.orb_range
+        orb_range: res.data.orb_range,
+        seq: res.data.seq
       }));
       setOrbMarking(false);
       toast.success('ORB range marked!');
@@ -778,12 +785,14 @@ const RealMarketZone = ({ user, onBack }) => {
         direction: tradeDirection,
         entry_price: parseFloat(entryPrice),
         stop_loss: parseFloat(stopLoss),
-        take_profit: takeProfit ? parseFloat(takeProfit) : null
+        take_profit: takeProfit ? parseFloat(takeProfit) : null,
+        seq: session.seq
       });
       
       setSession(prev => ({
         ...prev,
-        active_trade: res.data.trade
+        active_trade: res.data.trade,
+        seq: res.data.seq
       }));
       
       if (res.data.has_violations) {
@@ -814,15 +823,17 @@ const RealMarketZone = ({ user, onBack }) => {
 
   const completeEvaluation = async (evalData) => {
     try {
-      await axios.post(`${API}/real-market/close-trade`, {
+      const res = await axios.post(`${API}/real-market/close-trade`, {
         session_id: session.session_id,
-        ...evalData
+        ...evalData,
+        seq: session.seq
       });
       
       setSession(prev => ({
         ...prev,
         active_trade: null,
-        trades_completed: prev.trades_completed + 1
+        trades_completed: res.data.session_stats.trades_completed,
+        seq: res.data.seq
       }));
       
       setShowEvaluation(false);